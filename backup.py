@@ -4,11 +4,158 @@ Automated database backup tool
 """
 
 import os
+import sys
+import heapq
+import threading
+import hashlib
 import shutil
 import sqlite3
 from datetime import datetime
+from functools import partial
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
 import argparse
 
+# Optional compression support
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# Maps database content digests to the backup file holding them
+HASH_INDEX = ".hash_index"
+
+# Plain and zstd-compressed backup files
+BACKUP_EXTENSIONS = ('.db', '.db.zst')
+
+# Backup filenames carry their creation time; hard-linked backups share an mtime
+BACKUP_PREFIX = "ricemill_pos_backup_"
+BACKUP_TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+# Byte -> KB/MB factors for size display
+_INV_KB = 1.0 / (1 << 10)
+_INV_MB = 1.0 / (1 << 20)
+
+
+def _quote_identifier(name):
+    """Quote an SQL identifier, escaping embedded double quotes"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _backup_time(filename):
+    """Parse the creation time from a backup filename, or None if it has none"""
+    if not filename.startswith(BACKUP_PREFIX):
+        return None
+    stamp = filename[len(BACKUP_PREFIX):].split('.', 1)[0]
+    try:
+        return datetime.strptime(stamp, BACKUP_TIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def _copy_file(src_path, dst_path):
+    """Copy a file inside the kernel where possible, preserving metadata
+
+    The data goes to a temporary file that only replaces dst_path once its
+    size matches the source, so a failed copy never leaves a partial file.
+    """
+    tmp_path = f"{dst_path}.part"
+    try:
+        with open(src_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            src_fd = src.fileno()
+            dst_fd = dst.fileno()
+            size = os.fstat(src_fd).st_size
+            
+            fadvise = getattr(os, 'posix_fadvise', None)
+            if fadvise:
+                fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            
+            # copy_file_range can reflink on Btrfs/XFS; sendfile works on most other filesystems
+            strategies = []
+            if hasattr(os, 'copy_file_range'):
+                strategies.append(lambda offset, count: os.copy_file_range(src_fd, dst_fd, count, offset, offset))
+            if hasattr(os, 'sendfile'):
+                strategies.append(lambda offset, count: os.sendfile(dst_fd, src_fd, offset, count))
+            
+            for copy_chunk in strategies:
+                try:
+                    offset = 0
+                    while offset < size:
+                        sent = copy_chunk(offset, size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                    if offset == size:
+                        break
+                except OSError:
+                    pass
+                # Start the next strategy from an empty file; sendfile moves dst's position
+                dst.truncate(0)
+                dst.seek(0)
+            else:
+                # No kernel copy available, or every kernel copy came up short
+                src.seek(0)
+                shutil.copyfileobj(src, dst, 1 << 20)
+            
+            dst.flush()
+            copied = os.fstat(dst_fd).st_size
+            if copied != size:
+                raise OSError(f"Copied {copied} of {size} bytes from '{src_path}'")
+            os.fsync(dst_fd)
+            
+            if fadvise:
+                # Drop the copied pages so a large backup doesn't evict the live working set
+                fadvise(src_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                fadvise(dst_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        
+        shutil.copystat(src_path, tmp_path)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _compress_file(src_path, dst_path):
+    """Stream a file through zstd"""
+    cctx = zstd.ZstdCompressor(level=3, threads=-1)
+    with open(src_path, 'rb', buffering=1 << 20) as src, open(dst_path, 'wb', buffering=1 << 20) as dst:
+        cctx.copy_stream(src, dst, read_size=1 << 20, write_size=1 << 20)
+
+
+def _decompress_file(src_path, dst_path):
+    """Stream a zstd-compressed database back to its original contents
+
+    Like _copy_file, the output only replaces dst_path once the frame has
+    decoded completely and the result passes an SQLite quick_check.
+    """
+    tmp_path = f"{dst_path}.part"
+    try:
+        dobj = zstd.ZstdDecompressor().decompressobj()
+        with open(src_path, 'rb', buffering=1 << 20) as src, open(tmp_path, 'wb', buffering=1 << 20) as dst:
+            for chunk in iter(partial(src.read, 1 << 20), b''):
+                dst.write(dobj.decompress(chunk))
+            if not dobj.eof:
+                raise ValueError(f"'{src_path}' is truncated")
+            dst.flush()
+            os.fsync(dst.fileno())
+        
+        conn = sqlite3.connect(tmp_path)
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != 'ok':
+            raise ValueError(f"'{src_path}' failed quick_check: {result}")
+        
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 
 class BackupManager:
     """Manages database backups"""
@@ -17,31 +164,150 @@ class BackupManager:
         self.db_path = db_path
         self.backup_dir = backup_dir
         
+        # Cached backup scan, keyed on the backup directory's mtime
+        self._backup_cache = None
+        self._backup_cache_key = None
+        
         # Create backup directory if it doesn't exist
         if not os.path.exists(backup_dir):
             os.makedirs(backup_dir)
+        
+        self._ensure_wal()
+    
+    def _ensure_wal(self):
+        """Switch the database to WAL so backups never block the POS writers"""
+        if not os.path.exists(self.db_path):
+            return
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                # journal_mode is persistent; the other WAL pragmas are per-connection
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"WARNING: Could not enable WAL mode - {str(e)}")
+    
+    def _checkpoint(self, conn, mode="PASSIVE"):
+        """Flush the WAL into the main database file, returning True if it is now complete"""
+        busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return busy == 0 and log_frames == checkpointed
+    
+    def _file_digest(self, path):
+        """Return the BLAKE2b hex digest of a file"""
+        with open(path, 'rb') as f:
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, hashlib.blake2b).hexdigest()
+            
+            digest = hashlib.blake2b()
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+            return digest.hexdigest()
+    
+    def _read_file_digests(self):
+        """Read the index as backup filename -> digest, oldest entry first"""
+        # Only a file's latest entry counts, since incremental backups rewrite files in place
+        file_digests = {}
+        index_path = os.path.join(self.backup_dir, HASH_INDEX)
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    digest, _, filename = line.rstrip('\n').partition(' ')
+                    if filename:
+                        file_digests.pop(filename, None)
+                        file_digests[filename] = digest
+        return file_digests
     
-    def create_backup(self):
-        """Create a backup of the database"""
+    def _load_hash_index(self):
+        """Load the digest -> backup filename index"""
+        return {digest: filename for filename, digest in self._read_file_digests().items()}
+    
+    def _prune_hash_index(self):
+        """Rewrite the index without superseded entries or deleted backups"""
+        index_path = os.path.join(self.backup_dir, HASH_INDEX)
+        if not os.path.exists(index_path):
+            return
+        
+        tmp_path = f"{index_path}.part"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for filename, digest in self._read_file_digests().items():
+                if os.path.exists(os.path.join(self.backup_dir, filename)):
+                    f.write(f"{digest} {filename}\n")
+        os.replace(tmp_path, index_path)
+    
+    def _record_hash(self, digest, filename):
+        """Append a digest -> backup filename entry to the index"""
+        with open(os.path.join(self.backup_dir, HASH_INDEX), 'a', encoding='utf-8') as f:
+            f.write(f"{digest} {filename}\n")
+    
+    def create_backup(self, compress=False):
+        """Create a backup of the database (zstd-compressed if compress)"""
         if not os.path.exists(self.db_path):
             print(f"ERROR: Database file '{self.db_path}' not found!")
             return False
         
+        if compress and not ZSTD_AVAILABLE:
+            print("ERROR: Compressed backups require the 'zstandard' package")
+            return False
+        
         # Generate backup filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"ricemill_pos_backup_{timestamp}.db"
+        timestamp = datetime.now().strftime(BACKUP_TIME_FORMAT)
+        extension = '.db.zst' if compress else '.db'
+        backup_filename = f"{BACKUP_PREFIX}{timestamp}{extension}"
         backup_path = os.path.join(self.backup_dir, backup_filename)
         
         try:
-            # Copy database file
-            shutil.copy2(self.db_path, backup_path)
+            src = sqlite3.connect(self.db_path)
+            try:
+                # Best effort: if a writer is busy the backup API still reads through the WAL
+                digest = None
+                if self._checkpoint(src):
+                    # The main file holds everything, so its hash identifies the contents
+                    digest = self._file_digest(self.db_path)
+                
+                existing = self._load_hash_index().get(digest) if digest else None
+                existing_path = os.path.join(self.backup_dir, existing) if existing else None
+                
+                linked = False
+                if existing_path and existing.endswith(extension) and os.path.exists(existing_path):
+                    # Unchanged since an earlier backup; share its data instead of copying
+                    try:
+                        os.link(existing_path, backup_path)
+                        linked = True
+                    except OSError:
+                        pass
+                
+                if not linked:
+                    # Copy database pages through the SQLite Online Backup API so
+                    # the snapshot is consistent even while the POS has it open
+                    snapshot_path = f"{backup_path}.part" if compress else backup_path
+                    dst = sqlite3.connect(snapshot_path)
+                    try:
+                        src.backup(dst, pages=1024)
+                    finally:
+                        dst.close()
+                    
+                    if compress:
+                        _compress_file(snapshot_path, backup_path)
+                        os.remove(snapshot_path)
+                
+                if digest:
+                    # Point the digest at the newest file so cleanup of older ones keeps it usable
+                    self._record_hash(digest, backup_filename)
+            finally:
+                src.close()
             
             # Get file size
             size = os.path.getsize(backup_path)
-            size_mb = size / (1024 * 1024)
+            size_mb = size * _INV_MB
+            
+            self._backup_cache_key = None
             
             print(f"✓ Backup created successfully!")
             print(f"  File: {backup_path}")
+            if linked:
+                print(f"  Unchanged since: {existing} (hard-linked)")
             print(f"  Size: {size_mb:.2f} MB")
             print(f"  Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
@@ -51,29 +317,99 @@ class BackupManager:
             print(f"ERROR: Failed to create backup - {str(e)}")
             return False
     
-    def list_backups(self):
-        """List all available backups"""
-        if not os.path.exists(self.backup_dir):
-            print("No backups directory found")
-            return []
+    def create_incremental_backup(self, last_backup_path=None):
+        """Bring an existing backup up to date in place instead of writing a new file"""
+        if not os.path.exists(self.db_path):
+            print(f"ERROR: Database file '{self.db_path}' not found!")
+            return False
         
-        backups = []
-        for filename in os.listdir(self.backup_dir):
-            if filename.endswith('.db'):
-                filepath = os.path.join(self.backup_dir, filename)
-                size = os.path.getsize(filepath)
-                mtime = os.path.getmtime(filepath)
+        if last_backup_path is None:
+            plain = [b for b in self._scan_backups() if b['filename'].endswith('.db')]
+            if plain:
+                last_backup_path = max(plain, key=itemgetter('modified'))['path']
+        
+        if last_backup_path is None or not os.path.exists(last_backup_path):
+            return self.create_backup()
+        
+        backup_filename = os.path.basename(last_backup_path)
+        
+        try:
+            src = sqlite3.connect(self.db_path)
+            try:
+                digest = None
+                if self._checkpoint(src):
+                    digest = self._file_digest(self.db_path)
+                    if self._load_hash_index().get(digest) == backup_filename:
+                        print(f"✓ Database unchanged since {backup_filename}; nothing to do")
+                        return True
                 
-                backups.append({
-                    'filename': filename,
-                    'path': filepath,
-                    'size': size,
-                    'modified': datetime.fromtimestamp(mtime)
-                })
+                # Hard-linked backups share data with other files, so never write into them
+                shared = os.stat(last_backup_path).st_nlink > 1
+                if not shared:
+                    # Step through the copy in small batches so POS writers are only
+                    # blocked briefly; the destination is rewritten as one snapshot
+                    dst = sqlite3.connect(last_backup_path)
+                    try:
+                        src.backup(dst, pages=256)
+                    finally:
+                        dst.close()
+                    
+                    if digest:
+                        self._record_hash(digest, backup_filename)
+            finally:
+                src.close()
+            
+            if shared:
+                return self.create_backup()
+            
+            self._backup_cache_key = None
+            
+            print(f"✓ Backup updated successfully!")
+            print(f"  File: {last_backup_path}")
+            print(f"  Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            
+            return True
+            
+        except Exception as e:
+            print(f"ERROR: Failed to update backup - {str(e)}")
+            return False
+    
+    def _scan_backups(self):
+        """Scan the backup directory, reusing the last result if it is unchanged"""
+        key = os.stat(self.backup_dir).st_mtime_ns
+        if key == self._backup_cache_key:
+            return list(self._backup_cache)
         
-        # Sort by modification time (newest first)
-        backups.sort(key=lambda x: x['modified'], reverse=True)
+        with os.scandir(self.backup_dir) as entries:
+            candidates = [
+                entry for entry in entries
+                if entry.name.endswith(BACKUP_EXTENSIONS) and entry.is_file()
+            ]
+        
+        # Stat in inode order to avoid random seeks on spinning disks
+        candidates.sort(key=lambda entry: entry.inode())
         
+        backups = []
+        for entry in candidates:
+            # One stat per entry; DirEntry caches it
+            stat = entry.stat()
+            
+            # Hard links share one inode, so prefer the time in the filename
+            modified = _backup_time(entry.name) or datetime.fromtimestamp(stat.st_mtime)
+            
+            backups.append({
+                'filename': entry.name,
+                'path': entry.path,
+                'size': stat.st_size,
+                'modified': modified
+            })
+        
+        self._backup_cache = backups
+        self._backup_cache_key = key
+        return list(backups)
+    
+    def _print_backups(self, backups):
+        """Print a table of backups"""
         if backups:
             print("\nAvailable backups:")
             print("-" * 80)
@@ -81,14 +417,25 @@ class BackupManager:
             print("-" * 80)
             
             for i, backup in enumerate(backups, 1):
-                size_mb = backup['size'] / (1024 * 1024)
+                size_mb = backup['size'] * _INV_MB
                 date_str = backup['modified'].strftime('%Y-%m-%d %H:%M:%S')
                 print(f"{i:<4} {backup['filename']:<40} {size_mb:>8.2f} MB {date_str}")
             
             print("-" * 80)
         else:
             print("No backups found")
+    
+    def list_backups(self):
+        """List all available backups"""
+        if not os.path.exists(self.backup_dir):
+            print("No backups directory found")
+            return []
+        
+        # Sort by modification time (newest first)
+        backups = self._scan_backups()
+        backups.sort(key=itemgetter('modified'), reverse=True)
         
+        self._print_backups(backups)
         return backups
     
     def restore_backup(self, backup_path):
@@ -97,15 +444,33 @@ class BackupManager:
             print(f"ERROR: Backup file '{backup_path}' not found!")
             return False
         
+        compressed = backup_path.endswith('.zst')
+        if compressed and not ZSTD_AVAILABLE:
+            print("ERROR: Restoring a compressed backup requires the 'zstandard' package")
+            return False
+        
         try:
             # Create a backup of current database first
             if os.path.exists(self.db_path):
+                # Fold and empty the WAL so the main file is complete and no stale
+                # WAL frames get replayed on top of the restored database
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    if not self._checkpoint(conn, "TRUNCATE"):
+                        print("ERROR: Database is busy; close the POS application and try again")
+                        return False
+                finally:
+                    conn.close()
+                
                 safety_backup = f"{self.db_path}.before_restore"
-                shutil.copy2(self.db_path, safety_backup)
+                _copy_file(self.db_path, safety_backup)
                 print(f"Current database backed up to: {safety_backup}")
             
             # Restore from backup
-            shutil.copy2(backup_path, self.db_path)
+            if compressed:
+                _decompress_file(backup_path, self.db_path)
+            else:
+                _copy_file(backup_path, self.db_path)
             
             print(f"✓ Database restored successfully from: {backup_path}")
             return True
@@ -114,45 +479,79 @@ class BackupManager:
             print(f"ERROR: Failed to restore backup - {str(e)}")
             return False
     
-    def clean_old_backups(self, keep_count=30):
+    def clean_old_backups(self, keep_count=30, verbose=False):
         """Remove old backups, keeping only the most recent ones"""
-        backups = self.list_backups()
+        if not os.path.exists(self.backup_dir):
+            print("No backups directory found")
+            return
+        
+        backups = self._scan_backups()
         
         if len(backups) <= keep_count:
             print(f"Only {len(backups)} backups found. No cleanup needed.")
             return
         
-        # Remove old backups
-        to_remove = backups[keep_count:]
+        # Pick the most recent backups to keep without sorting the whole list
+        keep = {id(backup) for backup in heapq.nlargest(keep_count, backups, key=itemgetter('modified'))}
         
-        print(f"\nRemoving {len(to_remove)} old backup(s)...")
+        print(f"\nRemoving {len(backups) - len(keep)} old backup(s)...")
         
-        for backup in to_remove:
+        for backup in backups:
+            if id(backup) in keep:
+                continue
             try:
-                os.remove(backup['path'])
-                print(f"  Removed: {backup['filename']}")
+                os.unlink(backup['path'])
+                if verbose:
+                    print(f"  Removed: {backup['filename']}")
             except Exception as e:
                 print(f"  ERROR removing {backup['filename']}: {str(e)}")
         
+        self._prune_hash_index()
+        self._backup_cache_key = None
+        
         print(f"✓ Cleanup complete. {keep_count} most recent backups retained.")
     
-    def export_to_sql(self, output_file=None):
-        """Export database to SQL dump file"""
+    def _connect_for_reading(self, query_only=True, check_same_thread=True):
+        """Open a connection tuned for one-off read-heavy sessions"""
+        conn = sqlite3.connect(self.db_path, cached_statements=256,
+                               check_same_thread=check_same_thread)
+        conn.execute("PRAGMA cache_size=-262144")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=1073741824")
+        if query_only:
+            # VACUUM INTO counts as a write, so binary exports skip this
+            conn.execute("PRAGMA query_only=1")
+        return conn
+    
+    def export_to_sql(self, output_file=None, binary=False):
+        """Export database to SQL dump file (or a compact .db snapshot if binary)"""
         if not output_file:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = f"ricemill_pos_dump_{timestamp}.sql"
+            extension = "db" if binary else "sql"
+            output_file = f"ricemill_pos_dump_{timestamp}.{extension}"
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect_for_reading(query_only=not binary)
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                for line in conn.iterdump():
-                    f.write(f'{line}\n')
+            if binary:
+                # VACUUM INTO writes a compacted copy without any Python-level row iteration
+                conn.execute("VACUUM INTO ?", (output_file,))
+            else:
+                # Join statements into chunks so each write() covers thousands of lines
+                with open(output_file, 'wb', buffering=1 << 20) as f:
+                    chunk = []
+                    for line in conn.iterdump():
+                        chunk.append(line.encode('utf-8'))
+                        if len(chunk) >= 4096:
+                            f.write(b'\n'.join(chunk) + b'\n')
+                            chunk.clear()
+                    if chunk:
+                        f.write(b'\n'.join(chunk) + b'\n')
             
             conn.close()
             
             size = os.path.getsize(output_file)
-            size_kb = size / 1024
+            size_kb = size * _INV_KB
             
             print(f"✓ SQL dump created successfully!")
             print(f"  File: {output_file}")
@@ -164,6 +563,15 @@ class BackupManager:
             print(f"ERROR: Failed to create SQL dump - {str(e)}")
             return False
     
+    def _count_rows(self, readers, count_sql):
+        """Run a COUNT(*) statement, reusing the calling thread's read connection"""
+        # Each new connection re-parses the schema, so open one per worker, not per table
+        conn = readers.get(threading.get_ident())
+        if conn is None:
+            conn = self._connect_for_reading(check_same_thread=False)
+            readers[threading.get_ident()] = conn
+        return conn.execute(count_sql).fetchone()[0]
+    
     def get_database_info(self):
         """Display database information"""
         if not os.path.exists(self.db_path):
@@ -171,7 +579,7 @@ class BackupManager:
             return
         
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect_for_reading()
             cursor = conn.cursor()
             
             print("\n" + "="*60)
@@ -180,7 +588,7 @@ class BackupManager:
             
             # Database file info
             size = os.path.getsize(self.db_path)
-            size_mb = size / (1024 * 1024)
+            size_mb = size * _INV_MB
             mtime = datetime.fromtimestamp(os.path.getmtime(self.db_path))
             
             print(f"File: {self.db_path}")
@@ -197,11 +605,20 @@ class BackupManager:
             print(f"{'Table Name':<30} {'Row Count':>15}")
             print("-" * 60)
             
-            for table in tables:
-                table_name = table[0]
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                count = cursor.fetchone()[0]
-                print(f"{table_name:<30} {count:>15,}")
+            # Count tables concurrently, one read connection per worker
+            table_names = [table[0] for table in tables]
+            count_statements = [f"SELECT COUNT(*) FROM {_quote_identifier(name)}" for name in table_names]
+            if table_names:
+                readers = {}
+                try:
+                    with ThreadPoolExecutor(max_workers=min(8, len(table_names))) as executor:
+                        counts = executor.map(partial(self._count_rows, readers), count_statements)
+                        
+                        for table_name, count in zip(table_names, counts):
+                            print(f"{table_name:<30} {count:>15,}")
+                finally:
+                    for reader in readers.values():
+                        reader.close()
             
             print("-" * 60)
             
@@ -209,8 +626,16 @@ class BackupManager:
             cursor.execute("SELECT COUNT(*) FROM sales WHERE DATE(sale_date) = DATE('now')")
             today_sales = cursor.fetchone()[0]
             
-            cursor.execute("SELECT COUNT(*) FROM products WHERE is_active = 1")
-            active_products = cursor.fetchone()[0]
+            # Trigger-maintained counter; older databases fall back to a scan
+            try:
+                cursor.execute("SELECT cnt FROM row_counts WHERE counter = 'active_products'")
+                row = cursor.fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            if row is None:
+                cursor.execute("SELECT COUNT(*) FROM products WHERE is_active = 1")
+                row = cursor.fetchone()
+            active_products = row[0]
             
             print()
             print(f"Active Products: {active_products}")
@@ -227,12 +652,20 @@ def main():
     """Main function for command-line usage"""
     parser = argparse.ArgumentParser(description='Rice Mill POS Database Backup Utility')
     parser.add_argument('--backup', action='store_true', help='Create a new backup')
+    parser.add_argument('--compress', action='store_true',
+                       help='With --backup, compress the backup with zstd')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Bring the latest backup up to date in place')
     parser.add_argument('--list', action='store_true', help='List all backups')
     parser.add_argument('--restore', metavar='BACKUP_FILE', help='Restore from backup file')
     parser.add_argument('--clean', type=int, metavar='KEEP_COUNT', 
                        help='Clean old backups, keeping specified count')
     parser.add_argument('--export-sql', action='store_true', help='Export database to SQL dump')
+    parser.add_argument('--binary', action='store_true',
+                       help='With --export-sql, write a compact .db snapshot instead of SQL text')
     parser.add_argument('--info', action='store_true', help='Display database information')
+    parser.add_argument('--yes', action='store_true', help='Skip restore confirmation')
+    parser.add_argument('--verbose', action='store_true', help='Report each removed backup')
     parser.add_argument('--db', default='ricemill_pos.db', help='Database file path')
     parser.add_argument('--backup-dir', default='backups', help='Backup directory path')
     
@@ -241,26 +674,36 @@ def main():
     # Create backup manager
     manager = BackupManager(db_path=args.db, backup_dir=args.backup_dir)
     
-    # Execute requested action
+    # Execute requested actions; several can be chained in one run
+    # (e.g. --backup --clean 30)
+    has_actions = (args.backup or args.incremental or args.list or args.restore or args.clean is not None
+                   or args.export_sql or args.info)
+    
     if args.backup:
-        manager.create_backup()
+        manager.create_backup(compress=args.compress)
+    
+    if args.incremental:
+        manager.create_incremental_backup()
     
-    elif args.list:
+    if args.list:
         manager.list_backups()
     
-    elif args.restore:
-        manager.restore_backup(args.restore)
+    if args.restore:
+        # Confirm when run from a terminal; scripts and --yes skip the prompt
+        if args.yes or not sys.stdin.isatty() or \
+                input(f"Restore from '{args.restore}'? (yes/no): ").lower() == 'yes':
+            manager.restore_backup(args.restore)
     
-    elif args.clean:
-        manager.clean_old_backups(keep_count=args.clean)
+    if args.clean is not None:
+        manager.clean_old_backups(keep_count=args.clean, verbose=args.verbose)
     
-    elif args.export_sql:
-        manager.export_to_sql()
+    if args.export_sql:
+        manager.export_to_sql(binary=args.binary)
     
-    elif args.info:
+    if args.info:
         manager.get_database_info()
     
-    else:
+    if not has_actions:
         # Interactive mode
         print("="*60)
         print("Rice Mill POS - Backup Utility")
@@ -289,7 +732,8 @@ def main():
                 try:
                     num = int(input("\nEnter backup number to restore: "))
                     if 1 <= num <= len(backups):
-                        confirm = input(f"Restore from '{backups[num-1]['filename']}'? (yes/no): ")
+                        confirm = 'yes' if args.yes else \
+                            input(f"Restore from '{backups[num-1]['filename']}'? (yes/no): ")
                         if confirm.lower() == 'yes':
                             manager.restore_backup(backups[num-1]['path'])
                     else:
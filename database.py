@@ -5,24 +5,97 @@ Handles all database operations and initialization
 
 import sqlite3
 import os
+import math
+import logging
+import hmac
 import hashlib
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
 
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
 class Database:
+    # Bump whenever the schema script changes so existing databases re-run it
+    SCHEMA_VERSION = 2
+    
+    # Shared by update_stock and create_sale so both hit one cached statement
+    STOCK_UPDATE_SQL = """UPDATE stock 
+                          SET quantity_kg = quantity_kg + ?,
+                              quantity_bags = quantity_bags + ?,
+                              updated_by = ?
+                          WHERE product_id = ?"""
+    
+    AUTH_USER_SQL = "SELECT * FROM users WHERE username = ? AND is_active = 1"
+    
+    PRODUCT_FIELDS = ('name', 'quality', 'price_per_kg', 'bag_size_kg', 
+                      'price_per_bag', 'description', 'is_active')
+    
+    # One fixed statement for every field combination, so the prepared
+    # statement is reused; each field takes a (set?, value) parameter pair
+    # so optional columns can still be cleared to NULL
+    UPDATE_PRODUCT_SQL = "UPDATE products SET " + ", ".join(
+        f"{field} = CASE WHEN ? THEN ? ELSE {field} END" for field in PRODUCT_FIELDS
+    ) + " WHERE id = ?"
+    
     def __init__(self, db_path: str = "ricemill_pos.db"):
         """Initialize database connection"""
         self.db_path = db_path
-        self.connection = None
+        # One writer connection shared by all threads, with writes serialized
+        # by _write_lock, plus one read-only connection per thread; under WAL
+        # the readers never wait on an in-flight write
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self.connection = self._open_connection()
         self.init_database()
     
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a configured connection to the database file"""
+        # Autocommit mode; write paths open their own transactions
+        conn = sqlite3.connect(self.db_path, isolation_level=None,
+                               cached_statements=512, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        self.configure_connection(conn)
+        return conn
+    
     def get_connection(self) -> sqlite3.Connection:
-        """Get or create database connection"""
+        """Get the writer connection, reopening it after close()"""
         if self.connection is None:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
+            self.connection = self._open_connection()
         return self.connection
     
+    def _get_reader(self) -> sqlite3.Connection:
+        """Get the calling thread's read-only connection"""
+        conn = getattr(self._local, 'reader', None)
+        if conn is None:
+            conn = self._open_connection()
+            conn.execute("PRAGMA query_only=1")
+            self._local.reader = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+    
+    @staticmethod
+    def configure_connection(conn: sqlite3.Connection):
+        """Apply WAL mode and performance PRAGMAs to a new connection"""
+        journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            # e.g. network filesystems without shared memory support
+            logger.warning("WAL mode unavailable, using '%s' journal", journal_mode)
+        
+        # WAL only needs an fsync at checkpoint time
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        # 64 MB page cache; reads of up to 256 MB are served via mmap
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA foreign_keys=ON")
+    
     @staticmethod
     def row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
         """Convert sqlite3.Row to dictionary"""
@@ -32,20 +105,36 @@ class Database:
     
     def init_database(self):
         """Initialize database with schema"""
+        conn = self.get_connection()
+        
+        # The schema script is idempotent; skip it once it has been applied
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+        
         # Read schema from file or use embedded schema
         schema_file = "schema.sql"
         
         if os.path.exists(schema_file):
             with open(schema_file, 'r') as f:
                 schema = f.read()
+            sample_data = None
         else:
             schema = self.get_embedded_schema()
+            sample_data = self.get_sample_data()
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.executescript(schema)
-        conn.commit()
-        print("Database initialized successfully")
+        conn.executescript(schema)
+        
+        # Sample products only go into a brand new database
+        if sample_data and version == 0 and not conn.execute(
+            "SELECT 1 FROM products LIMIT 1"
+        ).fetchone():
+            conn.executescript(sample_data)
+        conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        
+        # Refresh planner statistics so new or upgraded indexes get picked up
+        conn.execute("ANALYZE")
+        logger.info("Database initialized successfully")
     
     def get_embedded_schema(self) -> str:
         """Returns embedded database schema"""
@@ -170,10 +259,118 @@ class Database:
             FOREIGN KEY (authorized_by) REFERENCES users(id)
         );
         
+        CREATE TABLE IF NOT EXISTS row_counts (
+            counter TEXT PRIMARY KEY,
+            cnt INTEGER NOT NULL DEFAULT 0
+        );
+        
+        CREATE INDEX IF NOT EXISTS idx_sales_day ON sales(DATE(sale_date));
+        CREATE INDEX IF NOT EXISTS idx_sales_date_voided ON sales(sale_date, is_voided);
+        CREATE INDEX IF NOT EXISTS idx_stock_product ON stock(product_id);
+        CREATE INDEX IF NOT EXISTS idx_payouts_date ON payouts(payout_date);
+        CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id);
+        CREATE INDEX IF NOT EXISTS idx_sale_items_product ON sale_items(product_id);
+        CREATE INDEX IF NOT EXISTS idx_transactions_product ON stock_transactions(product_id);
+        
+        CREATE TRIGGER IF NOT EXISTS update_daily_summary_on_sale
+        AFTER INSERT ON sales
+        WHEN NEW.is_voided = 0
+        BEGIN
+            INSERT INTO daily_summary (summary_date, total_sales, total_discount, total_transactions, cash_sales, credit_sales)
+            VALUES (
+                DATE(NEW.sale_date),
+                NEW.final_amount,
+                NEW.discount_amount,
+                1,
+                CASE WHEN NEW.payment_method = 'cash' THEN NEW.final_amount ELSE 0 END,
+                CASE WHEN NEW.payment_method = 'credit' THEN NEW.final_amount ELSE 0 END
+            )
+            ON CONFLICT(summary_date) DO UPDATE SET
+                total_sales = total_sales + NEW.final_amount,
+                total_discount = total_discount + NEW.discount_amount,
+                total_transactions = total_transactions + 1,
+                cash_sales = cash_sales + CASE WHEN NEW.payment_method = 'cash' THEN NEW.final_amount ELSE 0 END,
+                credit_sales = credit_sales + CASE WHEN NEW.payment_method = 'credit' THEN NEW.final_amount ELSE 0 END,
+                updated_at = CURRENT_TIMESTAMP;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS update_daily_summary_on_void
+        AFTER UPDATE OF is_voided ON sales
+        WHEN NEW.is_voided IS NOT OLD.is_voided
+        BEGIN
+            UPDATE daily_summary SET
+                total_sales = total_sales + (CASE WHEN NEW.is_voided = 1 THEN -1 ELSE 1 END) * NEW.final_amount,
+                total_discount = total_discount + (CASE WHEN NEW.is_voided = 1 THEN -1 ELSE 1 END) * NEW.discount_amount,
+                total_transactions = total_transactions + (CASE WHEN NEW.is_voided = 1 THEN -1 ELSE 1 END),
+                cash_sales = cash_sales + (CASE WHEN NEW.is_voided = 1 THEN -1 ELSE 1 END)
+                    * (CASE WHEN NEW.payment_method = 'cash' THEN NEW.final_amount ELSE 0 END),
+                credit_sales = credit_sales + (CASE WHEN NEW.is_voided = 1 THEN -1 ELSE 1 END)
+                    * (CASE WHEN NEW.payment_method = 'credit' THEN NEW.final_amount ELSE 0 END),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE summary_date = DATE(NEW.sale_date);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS count_active_products_insert
+        AFTER INSERT ON products
+        WHEN NEW.is_active = 1
+        BEGIN
+            UPDATE row_counts SET cnt = cnt + 1 WHERE counter = 'active_products';
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS count_active_products_delete
+        AFTER DELETE ON products
+        WHEN OLD.is_active = 1
+        BEGIN
+            UPDATE row_counts SET cnt = cnt - 1 WHERE counter = 'active_products';
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS count_active_products_update
+        AFTER UPDATE OF is_active ON products
+        WHEN NEW.is_active IS NOT OLD.is_active
+        BEGIN
+            UPDATE row_counts
+            SET cnt = cnt + (CASE WHEN NEW.is_active = 1 THEN 1 ELSE -1 END)
+            WHERE counter = 'active_products';
+        END;
+        
         -- Insert default admin user
         INSERT OR IGNORE INTO users (username, password_hash, role, full_name) 
         VALUES ('admin', 'admin123', 'admin', 'Administrator');
         
+        -- Backfill daily totals for sales recorded before the triggers existed
+        INSERT OR IGNORE INTO daily_summary (summary_date, total_sales, total_discount, total_transactions, cash_sales, credit_sales)
+        SELECT DATE(sale_date), SUM(final_amount), SUM(discount_amount), COUNT(*),
+               SUM(CASE WHEN payment_method = 'cash' THEN final_amount ELSE 0 END),
+               SUM(CASE WHEN payment_method = 'credit' THEN final_amount ELSE 0 END)
+        FROM sales
+        WHERE is_voided = 0
+        GROUP BY DATE(sale_date);
+        
+        -- Seed trigger-maintained counters
+        INSERT OR IGNORE INTO row_counts (counter, cnt)
+        SELECT 'active_products', COUNT(*) FROM products WHERE is_active = 1;
+        """
+    
+    @contextmanager
+    def _write_tx(self):
+        """Run a block inside a BEGIN IMMEDIATE transaction.
+        
+        Taking the write lock up front avoids the deferred read->write lock
+        upgrade that fails with SQLITE_BUSY while another reader is active.
+        """
+        with self._write_lock:
+            conn = self.get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+    
+    def get_sample_data(self) -> str:
+        """Returns sample products and stock for a new database"""
+        return """
         -- Insert sample products
         INSERT OR IGNORE INTO products (product_code, name, quality, price_per_kg, bag_size_kg, price_per_bag, description) 
         VALUES 
@@ -191,43 +388,104 @@ class Database:
         (4, 625.0, 25, 125.0);
         """
     
+    @staticmethod
+    def day_bounds(start_date: str = None, end_date: str = None) -> tuple:
+        """Return [start, end) timestamp bounds covering the given days.
+        
+        Timestamps are stored as UTC CURRENT_TIMESTAMP text, so comparing
+        against plain 'YYYY-MM-DD' strings lets SQLite use the date indexes
+        instead of scanning with DATE(column).
+        """
+        if start_date is None:
+            start_date = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        end_day = datetime.strptime(end_date or start_date, '%Y-%m-%d')
+        return start_date, (end_day + timedelta(days=1)).strftime('%Y-%m-%d')
+    
     def execute_query(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
         """Execute a query and return cursor"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        return cursor
+        # Autocommit connection: the statement is committed as it runs
+        with self._write_lock:
+            return self.get_connection().execute(query, params)
     
     def fetch_one(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
         """Fetch single row"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchone()
+        cursor = self._get_reader().execute(query, params)
+        row = cursor.fetchone()
+        # Reset the statement so the reader's snapshot is released
+        cursor.close()
+        return row
     
     def fetch_all(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
         """Fetch all rows"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchall()
+        return self._get_reader().execute(query, params).fetchall()
+    
+    def data_version(self) -> int:
+        """Counter that changes whenever any other connection commits a write"""
+        # Covers this process's writer connection as well as other programs
+        return self._get_reader().execute("PRAGMA data_version").fetchone()[0]
+    
+    def backup_to(self, backup_path: str, pages: int = 256):
+        """Copy the live database to backup_path with the SQLite Online Backup API"""
+        # Pages are copied in small batches through the calling thread's reader,
+        # so the snapshot is consistent and writers are only briefly held up
+        dst = sqlite3.connect(backup_path)
+        try:
+            self._get_reader().backup(dst, pages=pages)
+        finally:
+            dst.close()
     
     def close(self):
-        """Close database connection"""
+        """Close database connections"""
         if self.connection:
+            # Refresh planner statistics for the queries this session ran
+            try:
+                self.connection.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
             self.connection.close()
             self.connection = None
+        with self._readers_lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers = []
+        # Drop every thread's reference to its closed reader
+        self._local = threading.local()
     
     # User Authentication Methods
+    @staticmethod
+    def hash_password(password: str) -> str:
+        """Hash a password with scrypt as 'scrypt$<salt>$<hash>'"""
+        salt = os.urandom(16)
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=2**14, r=8, p=1)
+        return f"scrypt${salt.hex()}${digest.hex()}"
+    
+    @staticmethod
+    def verify_password(password: str, stored: str) -> bool:
+        """Check a password against a stored hash in constant time"""
+        if not stored.startswith('scrypt$'):
+            # Legacy plaintext value, migrated on successful login
+            return hmac.compare_digest(stored.encode(), password.encode())
+        
+        _, salt_hex, digest_hex = stored.split('$')
+        digest = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt_hex),
+                                n=2**14, r=8, p=1)
+        return hmac.compare_digest(digest, bytes.fromhex(digest_hex))
+    
     def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate user and return user data"""
-        user = self.fetch_one(
-            "SELECT * FROM users WHERE username = ? AND is_active = 1",
-            (username,)
-        )
+        # Nothing to look up for blank credentials
+        if not username or not password:
+            return None
+        
+        user = self.fetch_one(self.AUTH_USER_SQL, (username,))
         
-        if user and user['password_hash'] == password:
+        if user and self.verify_password(password, user['password_hash']):
+            if not user['password_hash'].startswith('scrypt$'):
+                with self._write_tx() as conn:
+                    conn.execute(
+                        "UPDATE users SET password_hash = ? WHERE id = ?",
+                        (self.hash_password(password), user['id'])
+                    )
             return {
                 'id': user['id'],
                 'username': user['username'],
@@ -238,11 +496,12 @@ class Database:
     
     def create_user(self, username: str, password: str, role: str, full_name: str) -> int:
         """Create new user"""
-        cursor = self.execute_query(
-            """INSERT INTO users (username, password_hash, role, full_name) 
-               VALUES (?, ?, ?, ?)""",
-            (username, password, role, full_name)
-        )
+        with self._write_tx() as conn:
+            cursor = conn.execute(
+                """INSERT INTO users (username, password_hash, role, full_name) 
+                   VALUES (?, ?, ?, ?)""",
+                (username, self.hash_password(password), role, full_name)
+            )
         return cursor.lastrowid
     
     # Product Methods
@@ -264,39 +523,36 @@ class Database:
                    price_per_kg: float, bag_size_kg: float = None, 
                    price_per_bag: float = None, description: str = None) -> int:
         """Add new product"""
-        cursor = self.execute_query(
-            """INSERT INTO products (product_code, name, quality, price_per_kg, 
-               bag_size_kg, price_per_bag, description) 
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (product_code, name, quality, price_per_kg, bag_size_kg, price_per_bag, description)
-        )
-        
-        # Initialize stock for new product
-        self.execute_query(
-            "INSERT INTO stock (product_id, quantity_kg, quantity_bags) VALUES (?, 0, 0)",
-            (cursor.lastrowid,)
-        )
+        with self._write_tx() as conn:
+            cursor = conn.execute(
+                """INSERT INTO products (product_code, name, quality, price_per_kg, 
+                   bag_size_kg, price_per_bag, description) 
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (product_code, name, quality, price_per_kg, bag_size_kg, price_per_bag, description)
+            )
+            product_id = cursor.lastrowid
+            
+            # Initialize stock for new product
+            conn.execute(
+                "INSERT INTO stock (product_id, quantity_kg, quantity_bags) VALUES (?, 0, 0)",
+                (product_id,)
+            )
         
-        return cursor.lastrowid
+        return product_id
     
     def update_product(self, product_id: int, **kwargs) -> bool:
         """Update product details"""
-        allowed_fields = ['name', 'quality', 'price_per_kg', 'bag_size_kg', 
-                         'price_per_bag', 'description', 'is_active']
-        
-        updates = []
-        values = []
-        for field, value in kwargs.items():
-            if field in allowed_fields:
-                updates.append(f"{field} = ?")
-                values.append(value)
-        
-        if not updates:
+        if not any(field in kwargs for field in self.PRODUCT_FIELDS):
             return False
         
+        values = []
+        for field in self.PRODUCT_FIELDS:
+            values.append(field in kwargs)
+            values.append(kwargs.get(field))
         values.append(product_id)
-        query = f"UPDATE products SET {', '.join(updates)} WHERE id = ?"
-        self.execute_query(query, tuple(values))
+        
+        with self._write_tx() as conn:
+            conn.execute(self.UPDATE_PRODUCT_SQL, tuple(values))
         return True
     
     # Stock Methods
@@ -305,6 +561,33 @@ class Database:
         row = self.fetch_one("SELECT * FROM stock WHERE product_id = ?", (product_id,))
         return self.row_to_dict(row)
     
+    def get_product_with_stock(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Get a product together with its stock levels, or None without stock"""
+        row = self.fetch_one(
+            """SELECT p.*, s.quantity_kg, s.quantity_bags, s.min_stock_kg
+               FROM products p
+               JOIN stock s ON s.id = (
+                   SELECT MIN(id) FROM stock WHERE product_id = p.id
+               )
+               WHERE p.id = ?""",
+            (product_id,)
+        )
+        return self.row_to_dict(row)
+    
+    def get_products_with_stock(self) -> List[Dict[str, Any]]:
+        """Get active products together with their stock levels"""
+        query = """
+        SELECT p.*, s.quantity_kg, s.quantity_bags
+        FROM products p
+        LEFT JOIN stock s ON s.id = (
+            SELECT MIN(id) FROM stock WHERE product_id = p.id
+        )
+        WHERE p.is_active = 1
+        ORDER BY p.name
+        """
+        rows = self.fetch_all(query)
+        return [self.row_to_dict(row) for row in rows] if rows else []
+    
     def get_all_stock_status(self) -> List[Dict[str, Any]]:
         """Get stock status for all products"""
         query = """
@@ -330,35 +613,26 @@ class Database:
                     quantity_bags_change: int, user_id: int, 
                     transaction_type: str, notes: str = None) -> bool:
         """Update stock levels"""
-        conn = self.get_connection()
         try:
-            cursor = conn.cursor()
-            
-            # Update stock
-            cursor.execute(
-                """UPDATE stock 
-                   SET quantity_kg = quantity_kg + ?,
-                       quantity_bags = quantity_bags + ?,
-                       updated_by = ?
-                   WHERE product_id = ?""",
-                (quantity_kg_change, quantity_bags_change, user_id, product_id)
-            )
-            
-            # Log transaction
-            cursor.execute(
-                """INSERT INTO stock_transactions 
-                   (product_id, transaction_type, quantity_kg_change, 
-                    quantity_bags_change, performed_by, notes)
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (product_id, transaction_type, quantity_kg_change, 
-                 quantity_bags_change, user_id, notes)
-            )
-            
-            conn.commit()
+            with self._write_tx() as conn:
+                # Update stock
+                conn.execute(
+                    self.STOCK_UPDATE_SQL,
+                    (quantity_kg_change, quantity_bags_change, user_id, product_id)
+                )
+                
+                # Log transaction
+                conn.execute(
+                    """INSERT INTO stock_transactions 
+                       (product_id, transaction_type, quantity_kg_change, 
+                        quantity_bags_change, performed_by, notes)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (product_id, transaction_type, quantity_kg_change, 
+                     quantity_bags_change, user_id, notes)
+                )
             return True
-        except Exception as e:
-            conn.rollback()
-            print(f"Stock update error: {e}")
+        except Exception:
+            logger.exception("Stock update failed")
             return False
     
     # Sales Methods
@@ -366,102 +640,135 @@ class Database:
         """Generate unique sale number"""
         today = datetime.now().strftime('%Y%m%d')
         
-        count = self.fetch_one(
-            "SELECT COUNT(*) as count FROM sales WHERE DATE(sale_date) = DATE('now')"
+        # Range probe on the unique sale_number index; '.' sorts right after '-'
+        last = self.fetch_one(
+            """SELECT sale_number FROM sales 
+               WHERE sale_number >= ? AND sale_number < ?
+               ORDER BY sale_number DESC LIMIT 1""",
+            (f"{today}-", f"{today}.")
         )
         
-        return f"{today}-{str(count['count'] + 1).zfill(4)}"
+        next_number = int(last['sale_number'].split('-')[1]) + 1 if last else 1
+        return f"{today}-{str(next_number).zfill(4)}"
     
     def create_sale(self, cashier_id: int, items: List[Dict], 
                    discount_amount: float = 0, discount_reason: str = None,
                    payment_method: str = 'cash', customer_name: str = None,
                    customer_phone: str = None, notes: str = None) -> Optional[int]:
         """Create a new sale with items"""
-        conn = self.get_connection()
-        
         try:
-            cursor = conn.cursor()
+            with self._write_tx() as conn:
+                # Check stock for every product in the cart with one query
+                requested = {}
+                for item in items:
+                    kg, bags = requested.get(item['product_id'], (0, 0))
+                    requested[item['product_id']] = (
+                        kg + (item.get('quantity_kg') or 0),
+                        bags + (item.get('quantity_bags') or 0)
+                    )
+                placeholders = ",".join("?" * len(requested))
+                available = {
+                    row['product_id']: (row['quantity_kg'], row['quantity_bags'])
+                    for row in conn.execute(
+                        f"""SELECT product_id, quantity_kg, quantity_bags FROM stock 
+                            WHERE product_id IN ({placeholders})""",
+                        tuple(requested)
+                    )
+                }
+                for product_id, (kg, bags) in requested.items():
+                    stock_kg, stock_bags = available.get(product_id, (0, 0))
+                    if kg > stock_kg or bags > stock_bags:
+                        raise ValueError(f"Insufficient stock for product {product_id}")
             
-            # Calculate totals
-            total_amount = sum(item['subtotal'] for item in items)
-            final_amount = total_amount - discount_amount
+                # Calculate totals
+                # fsum avoids accumulating float rounding error over long carts
+                total_amount = math.fsum([item['subtotal'] for item in items])
+                final_amount = total_amount - discount_amount
             
-            # Generate sale number
-            sale_number = self.generate_sale_number()
+                # Generate sale number
+                sale_number = self.generate_sale_number()
             
-            # Insert sale record
-            cursor.execute(
-                """INSERT INTO sales 
-                   (sale_number, cashier_id, customer_name, customer_phone,
-                    total_amount, discount_amount, discount_reason, final_amount,
-                    payment_method)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (sale_number, cashier_id, customer_name, customer_phone,
-                 total_amount, discount_amount, discount_reason, final_amount,
-                 payment_method)
-            )
+                # Insert sale record
+                cursor = conn.execute(
+                    """INSERT INTO sales 
+                       (sale_number, cashier_id, customer_name, customer_phone,
+                        total_amount, discount_amount, discount_reason, final_amount,
+                        payment_method)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (sale_number, cashier_id, customer_name, customer_phone,
+                     total_amount, discount_amount, discount_reason, final_amount,
+                     payment_method)
+                )
             
-            sale_id = cursor.lastrowid
+                sale_id = cursor.lastrowid
             
-            # Insert sale items and update stock
-            for item in items:
-                # Insert sale item
-                cursor.execute(
+                # Build parameter rows for sale items and the stock log
+                item_rows = []
+                transaction_rows = []
+                notes_text = f"Sale #{sale_number}"
+                for item in items:
+                    item_rows.append(
+                        (sale_id, item['product_id'], item['product_name'], 
+                         item['sale_type'], item.get('quantity_kg'), 
+                         item.get('quantity_bags'), item['price_per_unit'], 
+                         item['subtotal'])
+                    )
+                
+                    qty_kg = -(item.get('quantity_kg') or 0)
+                    qty_bags = -(item.get('quantity_bags') or 0)
+                    transaction_rows.append(
+                        (item['product_id'], qty_kg, qty_bags, sale_id, cashier_id, notes_text)
+                    )
+            
+                # Insert sale items
+                conn.executemany(
                     """INSERT INTO sale_items 
                        (sale_id, product_id, product_name, sale_type,
                         quantity_kg, quantity_bags, price_per_unit, subtotal)
                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (sale_id, item['product_id'], item['product_name'], 
-                     item['sale_type'], item.get('quantity_kg'), 
-                     item.get('quantity_bags'), item['price_per_unit'], 
-                     item['subtotal'])
+                    item_rows
                 )
-                
-                # Update stock
-                qty_kg = -(item.get('quantity_kg') or 0)
-                qty_bags = -(item.get('quantity_bags') or 0)
-                
-                cursor.execute(
-                    """UPDATE stock 
-                       SET quantity_kg = quantity_kg + ?,
-                           quantity_bags = quantity_bags + ?,
-                           updated_by = ?
-                       WHERE product_id = ?""",
-                    (qty_kg, qty_bags, cashier_id, item['product_id'])
+            
+                # Update stock once per product, using the totals checked above
+                conn.executemany(
+                    self.STOCK_UPDATE_SQL,
+                    [(-kg, -bags, cashier_id, product_id)
+                     for product_id, (kg, bags) in requested.items()]
                 )
-                
-                # Log stock transaction
-                cursor.execute(
+            
+                # Log stock transactions
+                conn.executemany(
                     """INSERT INTO stock_transactions 
                        (product_id, transaction_type, quantity_kg_change,
                         quantity_bags_change, reference_id, reference_type,
                         performed_by, notes)
                        VALUES (?, 'sale', ?, ?, ?, 'sale', ?, ?)""",
-                    (item['product_id'], qty_kg, qty_bags, sale_id, 
-                     cashier_id, f"Sale #{sale_number}")
+                    transaction_rows
                 )
             
-            conn.commit()
             return sale_id
             
-        except Exception as e:
-            conn.rollback()
-            print(f"Sale creation error: {e}")
+        except Exception:
+            logger.exception("Sale creation failed")
             return None
     
     def get_today_summary(self) -> Optional[Dict[str, Any]]:
         """Get today's sales summary"""
-        query = """
-        SELECT 
-            COUNT(*) as total_transactions,
-            COALESCE(SUM(final_amount), 0) as total_sales,
-            COALESCE(SUM(discount_amount), 0) as total_discount,
-            COALESCE(SUM(CASE WHEN payment_method = 'cash' THEN final_amount ELSE 0 END), 0) as cash_sales,
-            COALESCE(SUM(CASE WHEN payment_method = 'credit' THEN final_amount ELSE 0 END), 0) as credit_sales
-        FROM sales
-        WHERE DATE(sale_date) = DATE('now') AND is_voided = 0
-        """
-        row = self.fetch_one(query)
+        # daily_summary is kept current by the sales triggers; today's payouts
+        # ride along so the summary cards and cash drawer need one query
+        start, end = self.day_bounds()
+        row = self.fetch_one(
+            """SELECT COALESCE(d.total_transactions, 0) AS total_transactions,
+                      COALESCE(d.total_sales, 0) AS total_sales,
+                      COALESCE(d.total_discount, 0) AS total_discount,
+                      COALESCE(d.cash_sales, 0) AS cash_sales,
+                      COALESCE(d.credit_sales, 0) AS credit_sales,
+                      (SELECT COALESCE(SUM(amount), 0) FROM payouts
+                       WHERE payout_date >= ? AND payout_date < ?) AS total_payouts
+               FROM (SELECT 1)
+               LEFT JOIN daily_summary d ON d.summary_date = ?""",
+            (start, end, start)
+        )
         return self.row_to_dict(row)
     
     def get_recent_sales(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -480,25 +787,31 @@ class Database:
     
     def get_sale_details(self, sale_id: int) -> Dict[str, Any]:
         """Get complete sale details with items"""
-        sale = self.fetch_one(
+        # Plain tuples zipped with the column names read once per query
+        cursor = self._get_reader().cursor()
+        cursor.row_factory = None
+        
+        cursor.execute(
             """SELECT s.*, u.full_name as cashier_name
                FROM sales s
                JOIN users u ON s.cashier_id = u.id
                WHERE s.id = ?""",
             (sale_id,)
         )
-        
+        sale = cursor.fetchone()
         if not sale:
+            cursor.close()
             return None
+        sale_cols = [d[0] for d in cursor.description]
         
-        items = self.fetch_all(
-            "SELECT * FROM sale_items WHERE sale_id = ?",
-            (sale_id,)
-        )
+        cursor.execute("SELECT * FROM sale_items WHERE sale_id = ?", (sale_id,))
+        items = cursor.fetchall()
+        item_cols = [d[0] for d in cursor.description]
+        cursor.close()
         
         return {
-            'sale': dict(sale),
-            'items': [dict(item) for item in items]
+            'sale': dict(zip(sale_cols, sale)),
+            'items': [dict(zip(item_cols, item)) for item in items]
         }
     
     # Payout Methods
@@ -528,10 +841,10 @@ class Database:
         SELECT p.*, u.full_name as authorized_by_name
         FROM payouts p
         JOIN users u ON p.authorized_by = u.id
-        WHERE DATE(p.payout_date) BETWEEN ? AND ?
+        WHERE p.payout_date >= ? AND p.payout_date < ?
         ORDER BY p.payout_date DESC
         """
-        rows = self.fetch_all(query, (start_date, end_date))
+        rows = self.fetch_all(query, self.day_bounds(start_date, end_date))
         return [self.row_to_dict(row) for row in rows] if rows else []
     
     def get_total_payouts_today(self) -> float:
@@ -539,7 +852,8 @@ class Database:
         result = self.fetch_one(
             """SELECT COALESCE(SUM(amount), 0) as total_payouts
                FROM payouts
-               WHERE DATE(payout_date) = DATE('now')"""
+               WHERE payout_date >= ? AND payout_date < ?""",
+            self.day_bounds()
         )
         return result['total_payouts'] if result else 0
 
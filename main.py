@@ -6,11 +6,23 @@ Version: 1.0
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
+from tkinter import font as tkfont
 from datetime import datetime
 from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+import math
+import logging
 import sys
+import time
 import os
 
+# Report database warnings and failures (e.g. a failed sale) on stderr;
+# configured before the import below so connection setup is covered too
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 # Import database module
 try:
     from database import db
@@ -38,6 +50,116 @@ try:
 except Exception:
     REPORTS_AVAILABLE = False
 
+# Database work runs on one background thread so slow queries never block
+# the Tk event loop. Results come back through after() polling because Tk
+# must only be touched from the main thread.
+db_worker = ThreadPoolExecutor(max_workers=1)
+DB_POLL_MS = 20
+
+# Seconds a stock lookup is reused for quantity checks; create_sale
+# re-validates stock inside its transaction regardless
+STOCK_CACHE_TTL = 2.0
+
+# Sale type -> (stock column, unit, availability format) for stock checks
+SALE_TYPE_STOCK = {
+    'by_kg': ('quantity_kg', 'kg', '%.1f'),
+    'by_bag': ('quantity_bags', 'bags', '%s'),
+}
+
+# Stock status report row colours; anything else shows as 'available'
+STOCK_STATUS_TAGS = {'Low Stock': 'low_stock', 'Out of Stock': 'out_of_stock'}
+
+# Help menu texts
+USER_GUIDE_TEXT = """RICE MILL POS - USER GUIDE
+
+MAKING A SALE:
+1. Select product from list
+2. Click 'Add to Cart' or press F2
+3. Choose sale type (by kg or by bag)
+4. Enter quantity
+5. Click 'Add to Cart'
+6. Repeat for more items
+7. Apply discount if needed (Admin only)
+8. Click 'Cash Sale' or 'Credit Sale'
+
+KEYBOARD SHORTCUTS:
+F1 - New Sale (Clear Cart)
+F2 - Add selected product to cart
+F5 - Refresh product list
+ESC - Clear cart
+
+MANAGING STOCK (Admin):
+• Menu → Products → Manage Stock
+• Select product and choose:
+  - Restock: Add new inventory
+  - Adjust: Correct errors
+
+REPORTS:
+• Menu → Reports → Sales Reports
+• View today's summary
+• Export data to CSV
+
+For more help, contact your system administrator.
+"""
+
+SHORTCUTS_TEXT = """KEYBOARD SHORTCUTS
+
+F1    - New Sale (Clear Cart)
+F2    - Add Product to Cart
+F5    - Refresh Product List
+ESC   - Clear Cart
+Enter - Confirm dialogs
+"""
+
+ABOUT_TEXT = """🌾 RICE MILL POS SYSTEM
+Version 1.0
+
+Complete offline Point of Sale system
+for small rice mill businesses.
+
+Built with Python and Tkinter.
+"""
+
+
+class CartItem:
+    """A line in the sale cart"""
+    __slots__ = ('product_id', 'product_name', 'quality', 'sale_type',
+                 'quantity', 'price', 'subtotal', 'iid')
+    
+    def __init__(self, product_id, product_name, quality, sale_type,
+                 quantity, price, subtotal, iid=''):
+        self.product_id = product_id
+        self.product_name = product_name
+        self.quality = quality
+        self.sale_type = sale_type
+        self.quantity = quantity
+        self.price = price
+        self.subtotal = subtotal
+        # Treeview row showing this item
+        self.iid = iid
+
+
+def run_db_task(widget, on_done, func, *args, on_error=None):
+    """Run func(*args) on the database thread, then on_done(result) on the Tk thread"""
+    future = db_worker.submit(func, *args)
+    
+    def poll():
+        if not future.done():
+            widget.after(DB_POLL_MS, poll)
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                messagebox.showerror("Database Error", str(e), parent=widget)
+            return
+        on_done(result)
+    
+    widget.after(DB_POLL_MS, poll)
+    return future
+
 
 class LoginWindow:
     """Simple login window"""
@@ -46,6 +168,7 @@ class LoginWindow:
         self.root.title("Rice Mill POS - Login")
         self.root.geometry("400x300")
         self.user_data = None
+        self._logging_in = False
 
         self.create_widgets()
         self.center_window()
@@ -73,69 +196,9 @@ class LoginWindow:
         btn = tk.Button(frame, text="Login", bg="#27ae60", fg="white", command=self.login)
         btn.grid(row=2, column=0, columnspan=2, pady=12)
 
-    def login(self):
-        username = self.username_entry.get().strip()
-        password = self.password_entry.get().strip()
-        if not username or not password:
-            messagebox.showerror("Login Error", "Please enter username and password", parent=self.root)
-            return
-
-        user = db.authenticate_user(username, password)
-        if user:
-            self.user_data = user
-            self.root.destroy()
-        else:
-            messagebox.showerror("Login Failed", "Invalid credentials", parent=self.root)
-        ).grid(row=1, column=0, sticky="w", pady=15)
-        
-        self.password_entry = tk.Entry(
-            form_frame, 
-            font=("Arial", 12), 
-            width=25, 
-            show="●",
-            relief=tk.SOLID,
-            borderwidth=1
-        )
-        self.password_entry.grid(row=1, column=1, pady=15, padx=10)
-        
-        # Login button
-        login_btn = tk.Button(
-            form_frame, 
-            text="LOGIN", 
-            font=("Arial", 13, "bold"),
-            bg="#27ae60",
-            fg="white",
-            padx=40,
-            pady=10,
-            relief=tk.FLAT,
-            cursor="hand2",
-            command=self.login
-        )
-        login_btn.grid(row=2, column=0, columnspan=2, pady=25)
-        
         # Bind Enter key
         self.root.bind('<Return>', lambda e: self.login())
-        
-        # Footer with info
-        footer_frame = tk.Frame(main_frame, bg="#ecf0f1")
-        footer_frame.pack(side=tk.BOTTOM, pady=15)
-        
-        tk.Label(
-            footer_frame,
-            text="Default Login:",
-            font=("Arial", 9, "bold"),
-            bg="#ecf0f1",
-            fg="#7f8c8d"
-        ).pack()
-        
-        tk.Label(
-            footer_frame,
-            text="Username: admin | Password: admin123",
-            font=("Arial", 9),
-            bg="#ecf0f1",
-            fg="#95a5a6"
-        ).pack()
-    
+
     def login(self):
         """Handle login attempt"""
         username = self.username_entry.get().strip()
@@ -149,7 +212,18 @@ class LoginWindow:
             )
             return
         
-        user = db.authenticate_user(username, password)
+        # Password hashing is deliberately slow; keep the window responsive
+        if self._logging_in:
+            return
+        self._logging_in = True
+        self.root.config(cursor="watch")
+        run_db_task(self.root, self.finish_login, db.authenticate_user, username, password,
+                    on_error=self.login_failed)
+    
+    def finish_login(self, user):
+        """Handle the result of a background login attempt"""
+        self._logging_in = False
+        self.root.config(cursor="")
         
         if user:
             self.user_data = user
@@ -162,6 +236,12 @@ class LoginWindow:
             )
             self.password_entry.delete(0, tk.END)
             self.password_entry.focus()
+    
+    def login_failed(self, error):
+        """Re-enable login after authenticate_user raised"""
+        self._logging_in = False
+        self.root.config(cursor="")
+        messagebox.showerror("Database Error", str(error), parent=self.root)
 
 
 class POSApplication:
@@ -172,39 +252,205 @@ class POSApplication:
         self.user_data = user_data
         self.root.title(f"Rice Mill POS - {user_data['full_name']} ({user_data['role'].title()})")
         
-        # Set window size and make it maximizable
+        # Set window size; maximized once the widgets exist (see maximize_window)
         self.root.geometry("1280x720")
-        self.root.state('zoomed') if os.name == 'nt' else self.root.attributes('-zoomed', True)
+        
+        # Screen size for centering dialogs, read once
+        self._screen_width = self.root.winfo_screenwidth()
+        self._screen_height = self.root.winfo_screenheight()
         
         # Sale cart
         self.cart_items = []
+        # Sum of cart_items subtotals, adjusted as items change
+        self.cart_subtotal = 0.0
+        # Texts last shown on the subtotal, discount and total labels
+        self._totals_texts = (None, None, None)
         self.discount_amount = 0
         self.discount_reason = ""
         self.products = []
+        self._search_keys = []
+        self._trigram_index = {}
+        self._display_strings = []
+        self.stock_by_id = {}
+        self.index_to_product = []
+        self._visible_indices = None
+        self._filter_after_id = None
+        
+        # Recent stock lookups by product ID, with the time they were fetched
+        self._stock_cache = {}
+        self._stock_cache_ts = {}
+        
+        # Add to Cart dialog, built on first use and then only hidden/shown
+        self._addcart_dialog = None
+        self._addcart_product = None
+        self._addcart_stock = None
+        
+        # Report windows kept around (hidden) after their first use
+        self._stock_window = None
+        self._stock_tree = None
+        self._help_window = None
+        
+        # Today's summary is re-queried only when the day or the database changes;
+        # these two are only touched from the database thread
+        self._today_summary = None
+        self._summary_key = None
+        self._summary_texts = None
+        self._cash_drawer_texts = None
+        self._summary_job = None
+        
+        # Periodic summary refresh; see arm_refresh_timer
+        self._refresh_job = None
+        self._last_activity = time.monotonic()
         
         # Create GUI
+        self.create_fonts()
         self.create_menu()
         self.create_widgets()
+        
+        # Maximize after the widgets are built so the layout runs once
+        self.root.after(0, self.maximize_window)
+        
+        # Theme and icon are not needed for the first paint
+        self.root.after_idle(self.apply_styles)
+        
+        # Idle callbacks run in order, so data loading starts once the
+        # widgets' own redraws queued above have painted the window
+        self.root.after_idle(self.post_init)
+        
+        # Handle window close
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+    
+    def post_init(self):
+        """Start loading products and today's summary after the first paint"""
         self.load_products()
-        self.update_today_summary()
         
-        # Auto-refresh summary every minute
+        # Load the summary now and keep re-checking it (see arm_refresh_timer)
         self.schedule_refresh()
+    
+    def create_fonts(self):
+        """Create the named fonts shared by every widget in the application"""
+        # Widgets reference these instead of passing font tuples, so each
+        # font is resolved once rather than per widget
+        self.f_norm9 = tkfont.Font(self.root, family="Arial", size=9)
+        self.f_norm10 = tkfont.Font(self.root, family="Arial", size=10)
+        self.f_norm11 = tkfont.Font(self.root, family="Arial", size=11)
+        self.f_norm12 = tkfont.Font(self.root, family="Arial", size=12)
+        self.f_norm13 = tkfont.Font(self.root, family="Arial", size=13)
+        self.f_bold10 = tkfont.Font(self.root, family="Arial", size=10, weight="bold")
+        self.f_bold11 = tkfont.Font(self.root, family="Arial", size=11, weight="bold")
+        self.f_bold12 = tkfont.Font(self.root, family="Arial", size=12, weight="bold")
+        self.f_bold13 = tkfont.Font(self.root, family="Arial", size=13, weight="bold")
+        self.f_bold14 = tkfont.Font(self.root, family="Arial", size=14, weight="bold")
+        self.f_bold16 = tkfont.Font(self.root, family="Arial", size=16, weight="bold")
+        self.f_bold18 = tkfont.Font(self.root, family="Arial", size=18, weight="bold")
+        self.f_bold20 = tkfont.Font(self.root, family="Arial", size=20, weight="bold")
+        self.f_mono10 = tkfont.Font(self.root, family="Courier", size=10)
+    
+    def center_window(self, window, width, height):
+        """Size a window and center it using the cached screen size"""
+        x = (self._screen_width - width) // 2
+        y = (self._screen_height - height) // 2
+        window.geometry(f"{width}x{height}+{x}+{y}")
+    
+    def maximize_window(self):
+        """Maximize the main window"""
+        try:
+            self.root.state('zoomed')
+        except tk.TclError:
+            # X11 window managers have no 'zoomed' state
+            self.root.attributes('-zoomed', True)
+    
+    def apply_styles(self):
+        """Apply ttk theme, treeview styles and window icon"""
+        # Styles live in this window's Tk interpreter, so the report windows
+        # reuse what is configured here instead of re-styling on every open
+        style = ttk.Style(self.root)
+        style.theme_use('clam')
+        style.configure(
+            "Cart.Treeview",
+            background="white",
+            foreground="black",
+            rowheight=30,
+            fieldbackground="white",
+            font=self.f_norm10
+        )
+        style.configure(
+            "Cart.Treeview.Heading",
+            font=self.f_bold11,
+            background="#34495e",
+            foreground="white"
+        )
+        style.map('Cart.Treeview', background=[('selected', '#3498db')])
+        
+        for report in ("Stock.Treeview", "Payout.Treeview"):
+            style.configure(report, rowheight=25, font=self.f_norm10)
+            style.configure(f"{report}.Heading", font=self.f_bold11)
         
         # Set window icon if available
         try:
             self.root.iconbitmap('icon.ico')
         except:
             pass
-        
-        # Handle window close
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
     def schedule_refresh(self):
-        """Schedule periodic refresh of summary"""
-        self.update_today_summary()
-        self.update_cash_drawer()
-        self.root.after(60000, self.schedule_refresh)  # Refresh every minute
+        """Refresh the summary now and schedule the next periodic refresh"""
+        # Checkouts and payouts refresh directly; this only catches changes
+        # made elsewhere (other windows, the date rolling over)
+        self._refresh_job = None
+        self.refresh_summary()
+        self.arm_refresh_timer()
+    
+    def arm_refresh_timer(self):
+        """(Re)start the periodic refresh, polling more often while the till is busy"""
+        if self._refresh_job is not None:
+            self.root.after_cancel(self._refresh_job)
+        
+        idle = time.monotonic() - self._last_activity
+        if idle < 30:
+            interval = 5000      # just after a sale or payout
+        elif idle < 600:
+            interval = 60000     # activity within the last 10 minutes
+        else:
+            interval = 600000    # idle till
+        self._refresh_job = self.root.after(interval, self.schedule_refresh)
+    
+    def schedule_summary_refresh(self):
+        """Refresh the summary shortly, coalescing back-to-back sales and payouts"""
+        self._last_activity = time.monotonic()
+        self.arm_refresh_timer()
+        
+        if self._summary_job is not None:
+            self.root.after_cancel(self._summary_job)
+        self._summary_job = self.root.after(250, self.run_summary_refresh)
+    
+    def run_summary_refresh(self):
+        """Run a refresh scheduled by schedule_summary_refresh"""
+        self._summary_job = None
+        self.refresh_summary()
+    
+    def refresh_summary(self):
+        """Update the summary and cash drawer, re-querying only if data changed"""
+        # The queries run on the database thread; the labels update once the
+        # summary comes back
+        run_db_task(
+            self.root, self.show_today_summary, self.get_today_summary,
+            on_error=lambda e: print(f"Error loading today's summary: {str(e)}")
+        )
+    
+    def show_today_summary(self, summary):
+        """Show a freshly loaded summary on the cards and in the cash drawer"""
+        self.update_today_summary(summary)
+        self.update_cash_drawer(summary)
+    
+    def get_today_summary(self):
+        """Return today's summary, querying the database only when stale (database thread)"""
+        # data_version moves on every committed write (sales, voids, payouts,
+        # other programs), so an idle refresh costs one PRAGMA
+        key = (db.day_bounds()[0], db.data_version())
+        if key != self._summary_key:
+            self._today_summary = db.get_today_summary()
+            self._summary_key = key
+        return self._today_summary
     
     def create_menu(self):
         """Create application menu bar"""
@@ -227,23 +473,9 @@ class POSApplication:
         file_menu.add_command(label="Logout", command=self.logout)
         file_menu.add_command(label="Exit", command=self.on_closing)
         
-        # Products menu (Admin only)
+        # Products menu (Admin only; never built for cashiers)
         if self.user_data['role'] == 'admin':
-            products_menu = tk.Menu(menubar, tearoff=0)
-            menubar.add_cascade(label="Products", menu=products_menu)
-            products_menu.add_command(
-                label="Manage Products", 
-                command=self.manage_products
-            )
-            products_menu.add_command(
-                label="Manage Stock", 
-                command=self.manage_stock_dialog
-            )
-            products_menu.add_separator()
-            products_menu.add_command(
-                label="Add New Product", 
-                command=self.add_product_quick
-            )
+            self.add_lazy_menu(menubar, "Products", self.populate_products_menu)
         
         # Reports menu
         reports_menu = tk.Menu(menubar, tearoff=0)
@@ -263,21 +495,7 @@ class POSApplication:
         )
         
         # Tools menu
-        tools_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Tools", menu=tools_menu)
-        tools_menu.add_command(
-            label="Payout History", 
-            command=self.show_payout_history
-        )
-        tools_menu.add_separator()
-        tools_menu.add_command(
-            label="Database Info", 
-            command=self.show_database_info
-        )
-        tools_menu.add_command(
-            label="Export Data", 
-            command=self.export_data_dialog
-        )
+        self.add_lazy_menu(menubar, "Tools", self.populate_tools_menu)
         
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -293,6 +511,49 @@ class POSApplication:
         self.root.bind('<F5>', lambda e: self.load_products())
         self.root.bind('<Escape>', lambda e: self.clear_cart())
     
+    def add_lazy_menu(self, menubar, label, populate):
+        """Add a cascade whose entries are built the first time it opens"""
+        menu = tk.Menu(menubar, tearoff=0)
+        
+        def build():
+            menu.config(postcommand="")
+            populate(menu)
+        
+        menu.config(postcommand=build)
+        menubar.add_cascade(label=label, menu=menu)
+    
+    def populate_products_menu(self, products_menu):
+        """Fill in the admin Products menu"""
+        products_menu.add_command(
+            label="Manage Products", 
+            command=self.manage_products
+        )
+        products_menu.add_command(
+            label="Manage Stock", 
+            command=self.manage_stock_dialog
+        )
+        products_menu.add_separator()
+        products_menu.add_command(
+            label="Add New Product", 
+            command=self.add_product_quick
+        )
+    
+    def populate_tools_menu(self, tools_menu):
+        """Fill in the Tools menu"""
+        tools_menu.add_command(
+            label="Payout History", 
+            command=self.show_payout_history
+        )
+        tools_menu.add_separator()
+        tools_menu.add_command(
+            label="Database Info", 
+            command=self.show_database_info
+        )
+        tools_menu.add_command(
+            label="Export Data", 
+            command=self.export_data_dialog
+        )
+    
     def create_widgets(self):
         """Create main application widgets"""
         # Top frame - Header
@@ -307,7 +568,7 @@ class POSApplication:
         tk.Label(
             title_frame,
             text="🌾 Rice Mill POS",
-            font=("Arial", 20, "bold"),
+            font=self.f_bold20,
             bg="#2c3e50",
             fg="white"
         ).pack(side=tk.LEFT, padx=25, pady=15)
@@ -319,7 +580,7 @@ class POSApplication:
         tk.Label(
             info_frame,
             text=f"👤 {self.user_data['full_name']}",
-            font=("Arial", 11),
+            font=self.f_norm11,
             bg="#2c3e50",
             fg="#ecf0f1"
         ).pack(side=tk.TOP, pady=(15, 0))
@@ -327,7 +588,7 @@ class POSApplication:
         tk.Label(
             info_frame,
             text=f"Role: {self.user_data['role'].upper()}",
-            font=("Arial", 9),
+            font=self.f_norm9,
             bg="#2c3e50",
             fg="#95a5a6"
         ).pack(side=tk.TOP)
@@ -335,7 +596,7 @@ class POSApplication:
         self.status_label = tk.Label(
             info_frame,
             text="● OFFLINE MODE",
-            font=("Arial", 10, "bold"),
+            font=self.f_bold10,
             bg="#2c3e50",
             fg="#e74c3c"
         )
@@ -349,7 +610,7 @@ class POSApplication:
         left_panel = tk.LabelFrame(
             main_container,
             text="  📦 Available Products  ",
-            font=("Arial", 13, "bold"),
+            font=self.f_bold13,
             bg="white",
             fg="#2c3e50"
         )
@@ -362,17 +623,17 @@ class POSApplication:
         tk.Label(
             search_frame,
             text="🔍",
-            font=("Arial", 12),
+            font=self.f_norm12,
             bg="white"
         ).pack(side=tk.LEFT, padx=5)
         
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', self.filter_products)
+        self.search_var.trace('w', self.schedule_filter)
         
         search_entry = tk.Entry(
             search_frame,
             textvariable=self.search_var,
-            font=("Arial", 11),
+            font=self.f_norm11,
             relief=tk.SOLID,
             borderwidth=1
         )
@@ -385,9 +646,12 @@ class POSApplication:
         scrollbar = tk.Scrollbar(products_frame)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # Rows are set all at once through this Tcl list variable
+        self.products_listvar = tk.StringVar(self.root)
         self.products_listbox = tk.Listbox(
             products_frame,
-            font=("Arial", 11),
+            listvariable=self.products_listvar,
+            font=self.f_norm11,
             yscrollcommand=scrollbar.set,
             selectmode=tk.SINGLE,
             activestyle='dotbox',
@@ -407,7 +671,7 @@ class POSApplication:
         add_btn = tk.Button(
             btn_frame,
             text="➕ Add to Cart (F2)",
-            font=("Arial", 12, "bold"),
+            font=self.f_bold12,
             bg="#27ae60",
             fg="white",
             padx=20,
@@ -421,7 +685,7 @@ class POSApplication:
         tk.Button(
             btn_frame,
             text="🔄 Refresh (F5)",
-            font=("Arial", 10),
+            font=self.f_norm10,
             bg="#95a5a6",
             fg="white",
             padx=15,
@@ -435,7 +699,7 @@ class POSApplication:
         right_panel = tk.LabelFrame(
             main_container,
             text="  🛒 Shopping Cart  ",
-            font=("Arial", 13, "bold"),
+            font=self.f_bold13,
             bg="white",
             fg="#2c3e50"
         )
@@ -445,25 +709,7 @@ class POSApplication:
         cart_frame = tk.Frame(right_panel, bg="white")
         cart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Create style for treeview
-        style = ttk.Style()
-        style.theme_use('clam')
-        style.configure(
-            "Cart.Treeview",
-            background="white",
-            foreground="black",
-            rowheight=30,
-            fieldbackground="white",
-            font=("Arial", 10)
-        )
-        style.configure(
-            "Cart.Treeview.Heading",
-            font=("Arial", 11, "bold"),
-            background="#34495e",
-            foreground="white"
-        )
-        style.map('Cart.Treeview', background=[('selected', '#3498db')])
-        
+        # Treeview style is applied after the first paint (see apply_styles)
         columns = ('product', 'type', 'quantity', 'price', 'subtotal')
         self.cart_tree = ttk.Treeview(
             cart_frame,
@@ -501,7 +747,7 @@ class POSApplication:
         tk.Button(
             cart_btn_frame,
             text="✏️ Edit Selected",
-            font=("Arial", 10),
+            font=self.f_norm10,
             bg="#3498db",
             fg="white",
             padx=15,
@@ -514,7 +760,7 @@ class POSApplication:
         tk.Button(
             cart_btn_frame,
             text="❌ Remove Selected",
-            font=("Arial", 10),
+            font=self.f_norm10,
             bg="#e74c3c",
             fg="white",
             padx=15,
@@ -527,7 +773,7 @@ class POSApplication:
         tk.Button(
             cart_btn_frame,
             text="🗑️ Clear Cart (ESC)",
-            font=("Arial", 10),
+            font=self.f_norm10,
             bg="#95a5a6",
             fg="white",
             padx=15,
@@ -544,7 +790,7 @@ class POSApplication:
         self.subtotal_label = tk.Label(
             total_frame,
             text="Subtotal: RS.0.00",
-            font=("Arial", 13),
+            font=self.f_norm13,
             bg="#ecf0f1",
             anchor="e"
         )
@@ -553,7 +799,7 @@ class POSApplication:
         self.discount_label = tk.Label(
             total_frame,
             text="Discount: RS.0.00",
-            font=("Arial", 13),
+            font=self.f_norm13,
             bg="#ecf0f1",
             fg="#e74c3c",
             anchor="e"
@@ -566,7 +812,7 @@ class POSApplication:
         self.total_label = tk.Label(
             total_frame,
             text="TOTAL: RS.0.00",
-            font=("Arial", 18, "bold"),
+            font=self.f_bold18,
             bg="#ecf0f1",
             fg="#27ae60",
             anchor="e"
@@ -581,7 +827,7 @@ class POSApplication:
             tk.Button(
                 checkout_frame,
                 text="💰 Apply Discount",
-                font=("Arial", 11),
+                font=self.f_norm11,
                 bg="#f39c12",
                 fg="white",
                 padx=20,
@@ -594,7 +840,7 @@ class POSApplication:
         tk.Button(
             checkout_frame,
             text="💵 CASH PAYMENT",
-            font=("Arial", 13, "bold"),
+            font=self.f_bold13,
             bg="#27ae60",
             fg="white",
             padx=25,
@@ -612,7 +858,7 @@ class POSApplication:
         tk.Label(
             cash_drawer_panel,
             text="💳 CASH DRAWER - TODAY",
-            font=("Arial", 13, "bold"),
+            font=self.f_bold13,
             bg="#2c3e50",
             fg="white"
         ).pack(fill=tk.X, padx=15, pady=(10, 5))
@@ -628,15 +874,16 @@ class POSApplication:
         tk.Label(
             cash_sales_frame,
             text="Cash Sales",
-            font=("Arial", 10, "bold"),
+            font=self.f_bold10,
             bg="#27ae60",
             fg="white"
         ).pack()
         
+        self.cash_drawer_sales_var = tk.StringVar(self.root, value="RS.0.00")
         self.cash_drawer_sales_label = tk.Label(
             cash_sales_frame,
-            text="RS.0.00",
-            font=("Arial", 14, "bold"),
+            textvariable=self.cash_drawer_sales_var,
+            font=self.f_bold14,
             bg="#27ae60",
             fg="white"
         )
@@ -649,15 +896,16 @@ class POSApplication:
         tk.Label(
             payout_frame,
             text="Payouts",
-            font=("Arial", 10, "bold"),
+            font=self.f_bold10,
             bg="#e74c3c",
             fg="white"
         ).pack()
         
+        self.cash_drawer_payout_var = tk.StringVar(self.root, value="RS.0.00")
         self.cash_drawer_payout_label = tk.Label(
             payout_frame,
-            text="RS.0.00",
-            font=("Arial", 14, "bold"),
+            textvariable=self.cash_drawer_payout_var,
+            font=self.f_bold14,
             bg="#e74c3c",
             fg="white"
         )
@@ -670,15 +918,16 @@ class POSApplication:
         tk.Label(
             net_cash_frame,
             text="Net Cash",
-            font=("Arial", 10, "bold"),
+            font=self.f_bold10,
             bg="#f39c12",
             fg="white"
         ).pack()
         
+        self.cash_drawer_net_var = tk.StringVar(self.root, value="RS.0.00")
         self.cash_drawer_net_label = tk.Label(
             net_cash_frame,
-            text="RS.0.00",
-            font=("Arial", 14, "bold"),
+            textvariable=self.cash_drawer_net_var,
+            font=self.f_bold14,
             bg="#f39c12",
             fg="white"
         )
@@ -691,20 +940,20 @@ class POSApplication:
         tk.Button(
             cash_buttons_frame,
             text="🔄 Refresh Cash Status",
-            font=("Arial", 10, "bold"),
+            font=self.f_bold10,
             bg="#3498db",
             fg="white",
             padx=15,
             pady=8,
             relief=tk.FLAT,
             cursor="hand2",
-            command=self.update_cash_drawer
+            command=self.refresh_summary
         ).pack(side=tk.LEFT, padx=(0, 5))
         
         tk.Button(
             cash_buttons_frame,
             text="📋 View Payout History",
-            font=("Arial", 10, "bold"),
+            font=self.f_bold10,
             bg="#9b59b6",
             fg="white",
             padx=15,
@@ -717,7 +966,7 @@ class POSApplication:
         tk.Button(
             cash_buttons_frame,
             text="💸 New Payout",
-            font=("Arial", 10, "bold"),
+            font=self.f_bold10,
             bg="#e74c3c",
             fg="white",
             padx=15,
@@ -734,7 +983,7 @@ class POSApplication:
         tk.Label(
             bottom_panel,
             text="📊 TODAY'S SUMMARY",
-            font=("Arial", 12, "bold"),
+            font=self.f_bold12,
             bg="white",
             fg="#2c3e50"
         ).pack(pady=(10, 5))
@@ -783,59 +1032,164 @@ class POSApplication:
         tk.Label(
             card,
             text=title,
-            font=("Arial", 10),
+            font=self.f_norm10,
             bg=color,
             fg="white"
         ).pack()
         
+        value_var = tk.StringVar(card, value=value)
         label = tk.Label(
             card,
-            text=value,
-            font=("Arial", 16, "bold"),
+            textvariable=value_var,
+            font=self.f_bold16,
             bg=color,
             fg="white"
         )
         label.pack(pady=(5, 0))
         
-        # Store reference to label
+        # Store references to label and its text variable
         setattr(self, f"{var_name}_label", label)
+        setattr(self, f"{var_name}_var", value_var)
     
     def load_products(self):
         """Load products into listbox"""
-        self.products_listbox.delete(0, tk.END)
-        self.products = db.get_all_products()
-        
-        # Store display mapping for proper product lookup
-        self.product_display_map = {}
+        # Products and their stock levels in a single joined query, run off
+        # the Tk thread; the list is redrawn once the rows arrive
+        run_db_task(self.root, self.apply_products, db.get_products_with_stock)
+    
+    def apply_products(self, products):
+        """Show freshly loaded products and their stock levels"""
+        self.products = products
+        self._stock_cache.clear()
+        self.stock_by_id = {
+            product['id']: {
+                'product_id': product['id'],
+                'quantity_kg': product['quantity_kg'],
+                'quantity_bags': product['quantity_bags']
+            }
+            for product in self.products if product['quantity_kg'] is not None
+        }
+        # Lowercased search text per product, built once instead of per keystroke
+        self._search_keys = [
+            f"{product['name']} {product['quality']} {product['product_code']}".lower()
+            for product in self.products
+        ]
+        # Trigram -> positions of the products whose search text contains it
+        self._trigram_index = {}
+        for i, key in enumerate(self._search_keys):
+            for j in range(len(key) - 2):
+                self._trigram_index.setdefault(key[j:j + 3], set()).add(i)
+        # Listbox text per product; only changes when products or stock reload.
+        # One %-template per row, filled straight from the joined stock columns
+        in_stock = "%s - RS.%.2f/kg (%.1fkg, %s bags)"
+        out_of_stock = "%s - RS.%.2f/kg (Out of Stock)"
+        self._display_strings = [
+            in_stock % (product['name'], product['price_per_kg'],
+                        product['quantity_kg'], product['quantity_bags'])
+            if product['quantity_kg'] is not None else
+            out_of_stock % (product['name'], product['price_per_kg'])
+            for product in self.products
+        ]
+        # Sale type labels for the Add to Cart dialog, so opening it only
+        # has to config() the radio buttons
+        for product in self.products:
+            product['_by_kg_label'] = "By Kilogram - RS.%.2f/kg" % product['price_per_kg']
+            if product['bag_size_kg'] and product['price_per_bag']:
+                product['_by_bag_label'] = "By Bag (%skg) - RS.%.2f/bag" % (
+                    product['bag_size_kg'], product['price_per_bag'])
+            else:
+                product['_by_bag_label'] = None
         
-        for idx, product in enumerate(self.products):
-            stock = db.get_stock_by_product(product['id'])
-            stock_info = f" ({stock['quantity_kg']:.1f}kg, {stock['quantity_bags']} bags)" if stock else " (Out of Stock)"
-            
-            display = f"{product['name']} - RS.{product['price_per_kg']:.2f}/kg{stock_info}"
-            self.products_listbox.insert(tk.END, display)
-            self.product_display_map[display] = product
+        # Stock figures may have changed, so always redraw here
+        self._visible_indices = None
+        self.show_products(list(range(len(self.products))))
         
-        # Clear search
+        # Clear search; the list above is already unfiltered
         self.search_var.set("")
+        self.cancel_pending_filter()
+    
+    def show_products(self, indices):
+        """Show the products at the given positions of self.products"""
+        if indices == self._visible_indices:
+            # Same rows as on screen; skip touching Tcl entirely
+            return
+        self._visible_indices = indices
+        
+        items = [self._display_strings[i] for i in indices]
+        
+        # Listbox row index -> product, for O(1) selection lookup
+        self.index_to_product = [self.products[i] for i in indices]
+        
+        # Replacing the list variable swaps every row in a single Tcl call
+        self.products_listvar.set(tuple(items))
+    
+    def schedule_filter(self, *args):
+        """Debounce search typing into a single list rebuild"""
+        self.cancel_pending_filter()
+        self._filter_after_id = self.root.after(120, self.filter_products)
+    
+    def cancel_pending_filter(self):
+        """Drop a scheduled filter run, if any"""
+        if self._filter_after_id is not None:
+            self.root.after_cancel(self._filter_after_id)
+            self._filter_after_id = None
     
     def filter_products(self, *args):
         """Filter products based on search term"""
+        self._filter_after_id = None
         search_term = self.search_var.get().lower()
         
-        self.products_listbox.delete(0, tk.END)
-        self.filtered_products = []
+        if len(search_term) < 3:
+            # Too short for trigrams; scan every product
+            candidates = range(len(self._search_keys))
+        else:
+            # Only products holding every trigram of the term can contain it
+            postings = [
+                self._trigram_index.get(search_term[j:j + 3], ())
+                for j in range(len(search_term) - 2)
+            ]
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            candidates = sorted(candidates)
+        
+        self.show_products([
+            i for i in candidates if search_term in self._search_keys[i]
+        ])
+    
+    def get_cached_stock(self, product_id):
+        """Get a product's stock, re-querying at most every STOCK_CACHE_TTL seconds"""
+        now = time.monotonic()
+        if (product_id in self._stock_cache
+                and now - self._stock_cache_ts[product_id] < STOCK_CACHE_TTL):
+            return self._stock_cache[product_id]
+        
+        stock = db.get_product_with_stock(product_id)
+        self._stock_cache[product_id] = stock
+        self._stock_cache_ts[product_id] = now
+        return stock
+    
+    def check_stock(self, product_id, sale_type, quantity, parent):
+        """Check a quantity against stock; returns it normalized, or None if it can't be sold"""
+        stock = self.get_cached_stock(product_id)
+        if not stock:
+            messagebox.showerror(
+                "Out of Stock",
+                "This product is currently out of stock",
+                parent=parent
+            )
+            return None
         
-        for product in self.products:
-            product_text = f"{product['name']} {product['quality']} {product['product_code']}".lower()
-            
-            if search_term in product_text:
-                stock = db.get_stock_by_product(product['id'])
-                stock_info = f" ({stock['quantity_kg']:.1f}kg, {stock['quantity_bags']} bags)" if stock else " (Out of Stock)"
-                
-                display = f"{product['name']} - RS.{product['price_per_kg']:.2f}/kg{stock_info}"
-                self.products_listbox.insert(tk.END, display)
-                self.filtered_products.append(product)
+        field, unit, template = SALE_TYPE_STOCK[sale_type]
+        if sale_type == 'by_bag':
+            quantity = int(quantity)
+        if quantity > stock[field]:
+            messagebox.showerror(
+                "Insufficient Stock",
+                f"Only {template % stock[field]} {unit} available in stock",
+                parent=parent
+            )
+            return None
+        return quantity
     
     def add_to_cart(self):
         """Add selected product to cart"""
@@ -850,20 +1204,11 @@ class POSApplication:
         
         selected_index = selection[0]
         
-        # Get product from either filtered or full list
-        search_term = self.search_var.get().lower()
-        if search_term:
-            # Using filtered list
-            if selected_index >= len(self.filtered_products):
-                messagebox.showerror("Error", "Product not found", parent=self.root)
-                return
-            product = self.filtered_products[selected_index]
-        else:
-            # Using full list
-            if selected_index >= len(self.products):
-                messagebox.showerror("Error", "Product not found", parent=self.root)
-                return
-            product = self.products[selected_index]
+        # Rows map straight to the products that were listed
+        if selected_index >= len(self.index_to_product):
+            messagebox.showerror("Error", "Product not found", parent=self.root)
+            return
+        product = self.index_to_product[selected_index]
         
         # Check if product has valid data
         try:
@@ -875,7 +1220,7 @@ class POSApplication:
             return
         
         # Check stock before showing dialog
-        stock = db.get_stock_by_product(product_id)
+        stock = self.stock_by_id.get(product_id)
         if not stock or (stock['quantity_kg'] == 0 and stock['quantity_bags'] == 0):
             messagebox.showerror(
                 "Out of Stock",
@@ -884,99 +1229,117 @@ class POSApplication:
             )
             return
         
-        # Dialog to choose sale type and quantity
+        # Dialog to choose sale type and quantity; built once, then reused
+        dialog = self.get_add_to_cart_dialog()
+        self._addcart_product = product
+        self._addcart_stock = stock
+        
+        self._addcart_title.config(text=f"📦 {product_name}")
+        self._addcart_stock_label.config(
+            text=f"Available Stock: {stock['quantity_kg']:.1f}kg / {stock['quantity_bags']} bags"
+        )
+        self._addcart_kg_radio.config(text=product['_by_kg_label'])
+        
+        # Only offer bag sales when bag pricing is available
+        if product['_by_bag_label']:
+            self._addcart_bag_radio.config(text=product['_by_bag_label'])
+            self._addcart_bag_radio.pack(anchor=tk.W, pady=2)
+        else:
+            self._addcart_bag_radio.pack_forget()
+        
+        self._addcart_sale_type.set("by_kg")
+        self._addcart_quantity.set("1")
+        
+        dialog.deiconify()
+        dialog.lift()
+        dialog.grab_set()
+        self._addcart_entry.focus()
+        self._addcart_entry.select_range(0, tk.END)
+    
+    def get_add_to_cart_dialog(self):
+        """Return the Add to Cart dialog, building its widgets on first use"""
+        dialog = self._addcart_dialog
+        if dialog is not None and dialog.winfo_exists():
+            return dialog
+        
         dialog = tk.Toplevel(self.root)
+        dialog.withdraw()
         dialog.title("Add to Cart")
-        dialog.geometry("400x320")
+        self.center_window(dialog, 400, 320)
         dialog.transient(self.root)
-        dialog.grab_set()
         dialog.resizable(False, False)
-        
-        # Center dialog
-        dialog.update_idletasks()
-        x = (dialog.winfo_screenwidth() // 2) - (dialog.winfo_width() // 2)
-        y = (dialog.winfo_screenheight() // 2) - (dialog.winfo_height() // 2)
-        dialog.geometry(f"+{x}+{y}")
+        dialog.protocol("WM_DELETE_WINDOW", self.hide_add_to_cart_dialog)
         
         # Header
         header = tk.Frame(dialog, bg="#3498db")
         header.pack(fill=tk.X)
         
-        tk.Label(
+        self._addcart_title = tk.Label(
             header,
-            text=f"📦 {product_name}",
-            font=("Arial", 14, "bold"),
+            font=self.f_bold14,
             bg="#3498db",
             fg="white"
-        ).pack(pady=15)
+        )
+        self._addcart_title.pack(pady=15)
         
         # Form
         form_frame = tk.Frame(dialog, padx=30, pady=20)
         form_frame.pack(fill=tk.BOTH, expand=True)
         
         # Stock info
-        tk.Label(
+        self._addcart_stock_label = tk.Label(
             form_frame,
-            text=f"Available Stock: {stock['quantity_kg']:.1f}kg / {stock['quantity_bags']} bags",
-            font=("Arial", 10, "bold"),
+            font=self.f_bold10,
             fg="#27ae60"
-        ).pack(anchor="w", pady=(0, 15))
+        )
+        self._addcart_stock_label.pack(anchor="w", pady=(0, 15))
         
         # Sale type
         tk.Label(
             form_frame,
             text="Sale Type:",
-            font=("Arial", 11, "bold")
+            font=self.f_bold11
         ).pack(anchor="w", pady=(0, 5))
         
-        sale_type_var = tk.StringVar(value="by_kg")
+        self._addcart_sale_type = tk.StringVar(dialog, value="by_kg")
         
         type_frame = tk.Frame(form_frame)
         type_frame.pack(fill=tk.X, pady=(0, 15))
         
-        tk.Radiobutton(
+        self._addcart_kg_radio = tk.Radiobutton(
             type_frame,
-            text=f"By Kilogram - RS.{price_per_kg:.2f}/kg",
-            variable=sale_type_var,
+            variable=self._addcart_sale_type,
             value="by_kg",
-            font=("Arial", 10)
-        ).pack(anchor=tk.W, pady=2)
+            font=self.f_norm10
+        )
+        self._addcart_kg_radio.pack(anchor=tk.W, pady=2)
         
-        # Check if bag pricing is available
-        try:
-            bag_size_kg = product['bag_size_kg']
-            price_per_bag = product['price_per_bag']
-            if bag_size_kg and price_per_bag:
-                tk.Radiobutton(
-                    type_frame,
-                    text=f"By Bag ({bag_size_kg}kg) - RS.{price_per_bag:.2f}/bag",
-                    variable=sale_type_var,
-                    value="by_bag",
-                    font=("Arial", 10)
-                ).pack(anchor=tk.W, pady=2)
-        except (KeyError, TypeError):
-            pass
+        # Packed per product, only when it has bag pricing
+        self._addcart_bag_radio = tk.Radiobutton(
+            type_frame,
+            variable=self._addcart_sale_type,
+            value="by_bag",
+            font=self.f_norm10
+        )
         
         # Quantity
         tk.Label(
             form_frame,
             text="Quantity:",
-            font=("Arial", 11, "bold")
+            font=self.f_bold11
         ).pack(anchor="w", pady=(0, 5))
         
-        quantity_var = tk.StringVar(value="1")
-        quantity_entry = tk.Entry(
+        self._addcart_quantity = tk.StringVar(dialog, value="1")
+        self._addcart_entry = tk.Entry(
             form_frame,
-            textvariable=quantity_var,
-            font=("Arial", 11),
+            textvariable=self._addcart_quantity,
+            font=self.f_norm11,
             width=10,
             relief=tk.SOLID,
             borderwidth=1
         )
-        quantity_entry.pack(anchor="w")
-        quantity_entry.focus()
-        quantity_entry.select_range(0, tk.END)
-
+        self._addcart_entry.pack(anchor="w")
+        
         # Buttons
         btn_frame = tk.Frame(dialog)    
         btn_frame.pack(pady=15)
@@ -984,43 +1347,51 @@ class POSApplication:
         tk.Button(
             btn_frame,
             text="Add to Cart",
-            font=("Arial", 11, "bold"),
+            font=self.f_bold11,
             bg="#27ae60",
             fg="white",
             padx=20,
             pady=8,
             relief=tk.FLAT,
             cursor="hand2",
-            command=lambda: self.confirm_add_to_cart(
-                dialog,
-                product,
-                sale_type_var.get(),
-                quantity_var.get(),
-                stock
-            )
+            command=self.submit_add_to_cart
         ).pack(side=tk.LEFT, padx=10)
         
         tk.Button(
             btn_frame,
             text="Cancel",
-            font=("Arial", 11),
+            font=self.f_norm11,
             bg="#e74c3c",
             fg="white",
             padx=20,
             pady=8,
             relief=tk.FLAT,
             cursor="hand2",
-            command=dialog.destroy
+            command=self.hide_add_to_cart_dialog
         ).pack(side=tk.LEFT, padx=10)
         
         # Bind Enter key
-        dialog.bind('<Return>', lambda e: self.confirm_add_to_cart(
-            dialog,
-            product,
-            sale_type_var.get(),
-            quantity_var.get(),
-            stock
-        ))
+        dialog.bind('<Return>', lambda e: self.submit_add_to_cart())
+        
+        self._addcart_dialog = dialog
+        return dialog
+    
+    def submit_add_to_cart(self):
+        """Add the product currently shown in the Add to Cart dialog"""
+        self.confirm_add_to_cart(
+            self._addcart_dialog,
+            self._addcart_product,
+            self._addcart_sale_type.get(),
+            self._addcart_quantity.get(),
+            self._addcart_stock
+        )
+    
+    def hide_add_to_cart_dialog(self):
+        """Hide the Add to Cart dialog so it can be reused"""
+        dialog = self._addcart_dialog
+        if dialog is not None and dialog.winfo_exists():
+            dialog.grab_release()
+            dialog.withdraw()
     
     def confirm_add_to_cart(self, dialog, product, sale_type, quantity_str, stock):
         """Confirm adding product to cart"""
@@ -1044,15 +1415,6 @@ class POSApplication:
             messagebox.showerror("Error", "Invalid product data", parent=dialog)
             return
         
-        current_stock = db.get_stock_by_product(product_id)
-        if not current_stock:
-            messagebox.showerror(
-                "Out of Stock",
-                "This product is currently out of stock",
-                parent=dialog
-            )
-            return
-        
         try:
             price_per_kg = product['price_per_kg']
             price_per_bag = product['price_per_bag']
@@ -1060,27 +1422,14 @@ class POSApplication:
             messagebox.showerror("Error", "Invalid product pricing", parent=dialog)
             return
         
+        quantity = self.check_stock(product_id, sale_type, quantity, dialog)
+        if quantity is None:
+            return
+        
         if sale_type == 'by_kg':
-            if quantity > current_stock['quantity_kg']:
-                messagebox.showerror(
-                    "Insufficient Stock",
-                    f"Only {current_stock['quantity_kg']:.1f} kg available in stock",
-                    parent=dialog
-                )
-                return
             price = price_per_kg
-            qty_display = f"{quantity:.2f} kg"
         else:  # by_bag
-            quantity = int(quantity)
-            if quantity > current_stock['quantity_bags']:
-                messagebox.showerror(
-                    "Insufficient Stock",
-                    f"Only {current_stock['quantity_bags']} bags available in stock",
-                    parent=dialog
-                )
-                return
             price = price_per_bag if price_per_bag else price_per_kg
-            qty_display = f"{quantity} bags"
 
         subtotal = price * quantity
         
@@ -1089,19 +1438,18 @@ class POSApplication:
         except (KeyError, TypeError):
             quality = 'Standard'
         
-        cart_item = {
-            'product_id': product_id,
-            'product_name': product_name,
-            'quality': quality,
-            'sale_type': sale_type,
-            'quantity': quantity,
-            'price': price,
-            'subtotal': subtotal
-        }
+        cart_item = CartItem(
+            product_id, product_name, quality, sale_type, quantity, price, subtotal
+        )
         
         self.cart_items.append(cart_item)
-        self.refresh_cart()
-        dialog.destroy()
+        self.cart_subtotal += subtotal
+        # Only the new row goes to Tk; the rest of the cart is untouched
+        cart_item.iid = self.cart_tree.insert(
+            '', tk.END, values=self.cart_row_values(cart_item)
+        )
+        self.update_totals()
+        self.hide_add_to_cart_dialog()
         
         messagebox.showinfo(
             "Added to Cart",
@@ -1109,25 +1457,21 @@ class POSApplication:
             parent=self.root
         )
     
-    def refresh_cart(self):
-        """Refresh cart display"""
-        self.cart_tree.delete(*self.cart_tree.get_children())
-        
-        for item in self.cart_items:
-            if item['sale_type'] == 'by_kg':
-                qty_display = f"{item['quantity']:.2f} kg"
-            else:
-                qty_display = f"{item['quantity']} bags"
-            
-            self.cart_tree.insert('', tk.END, values=(
-                item['product_name'],
-                item['sale_type'].replace('_', ' ').title(),
-                qty_display,
-                f"RS.{item['price']:.2f}",
-                f"RS.{item['subtotal']:.2f}"
-            ))
-        
-        self.update_totals()
+    @staticmethod
+    def cart_row_values(item):
+        """Treeview column values for a cart item"""
+        if item.sale_type == 'by_kg':
+            qty_display = f"{item.quantity:.2f} kg"
+        else:
+            qty_display = f"{item.quantity} bags"
+        
+        return (
+            item.product_name,
+            item.sale_type.replace('_', ' ').title(),
+            qty_display,
+            f"RS.{item.price:.2f}",
+            f"RS.{item.subtotal:.2f}"
+        )
     
     def remove_from_cart(self):
         """Remove selected item from cart"""
@@ -1143,23 +1487,31 @@ class POSApplication:
         # Get index
         index = self.cart_tree.index(selection[0])
         
-        # Remove from cart
+        # Remove from tree, then from cart
+        self.cart_tree.delete(self.cart_items[index].iid)
+        self.cart_subtotal -= self.cart_items[index].subtotal
         del self.cart_items[index]
-        
-        # Remove from tree
-        self.cart_tree.delete(selection[0])
+        if not self.cart_items:
+            self.cart_subtotal = 0.0
         
         self.update_totals()
     
     def update_totals(self):
         """Update cart totals"""
-        subtotal = sum(item['subtotal'] for item in self.cart_items)
-        
-        self.subtotal_label.config(text=f"Subtotal: RS.{subtotal:.2f}")
-        self.discount_label.config(text=f"Discount: -RS.{self.discount_amount:.2f}")
-        
+        subtotal = self.cart_subtotal
         total = subtotal - self.discount_amount
-        self.total_label.config(text=f"TOTAL: RS.{total:.2f}")
+        
+        texts = (
+            f"Subtotal: RS.{subtotal:.2f}",
+            f"Discount: -RS.{self.discount_amount:.2f}",
+            f"TOTAL: RS.{total:.2f}"
+        )
+        # Only reconfigure (and redraw) the labels whose text changed
+        labels = (self.subtotal_label, self.discount_label, self.total_label)
+        for label, text, last in zip(labels, texts, self._totals_texts):
+            if text != last:
+                label.config(text=text)
+        self._totals_texts = texts
     
     def edit_cart_item(self):
         """Edit selected item in cart"""
@@ -1179,25 +1531,19 @@ class POSApplication:
         # Create edit dialog
         dialog = tk.Toplevel(self.root)
         dialog.title("Edit Cart Item")
-        dialog.geometry("400x280")
+        self.center_window(dialog, 400, 280)
         dialog.transient(self.root)
         dialog.grab_set()
         dialog.resizable(False, False)
         
-        # Center dialog
-        dialog.update_idletasks()
-        x = (dialog.winfo_screenwidth() // 2) - (dialog.winfo_width() // 2)
-        y = (dialog.winfo_screenheight() // 2) - (dialog.winfo_height() // 2)
-        dialog.geometry(f"+{x}+{y}")
-        
         # Header
         header = tk.Frame(dialog, bg="#f39c12")
         header.pack(fill=tk.X)
         
         tk.Label(
             header,
-            text=f"✏️ {item['product_name']}",
-            font=("Arial", 14, "bold"),
+            text=f"✏️ {item.product_name}",
+            font=self.f_bold14,
             bg="#f39c12",
             fg="white"
         ).pack(pady=15)
@@ -1210,14 +1556,14 @@ class POSApplication:
         tk.Label(
             form_frame,
             text="Quantity:",
-            font=("Arial", 11, "bold")
+            font=self.f_bold11
         ).pack(anchor="w", pady=(0, 5))
         
-        quantity_var = tk.StringVar(value=str(item['quantity']))
+        quantity_var = tk.StringVar(value=str(item.quantity))
         quantity_entry = tk.Entry(
             form_frame,
             textvariable=quantity_var,
-            font=("Arial", 11),
+            font=self.f_norm11,
             width=10,
             relief=tk.SOLID,
             borderwidth=1
@@ -1229,8 +1575,8 @@ class POSApplication:
         # Price info
         tk.Label(
             form_frame,
-            text=f"Price: RS.{item['price']:.2f}",
-            font=("Arial", 10)
+            text=f"Price: RS.{item.price:.2f}",
+            font=self.f_norm10
         ).pack(anchor="w", pady=(0, 10))
         
         # Buttons
@@ -1240,7 +1586,7 @@ class POSApplication:
         tk.Button(
             btn_frame,
             text="Update",
-            font=("Arial", 11, "bold"),
+            font=self.f_bold11,
             bg="#27ae60",
             fg="white",
             padx=20,
@@ -1253,7 +1599,7 @@ class POSApplication:
         tk.Button(
             btn_frame,
             text="Cancel",
-            font=("Arial", 11),
+            font=self.f_norm11,
             bg="#e74c3c",
             fg="white",
             padx=20,
@@ -1281,30 +1627,19 @@ class POSApplication:
         item = self.cart_items[index]
         
         # Check stock
-        stock = db.get_stock_by_product(item['product_id'])
-        if item['sale_type'] == 'by_kg':
-            if quantity > stock['quantity_kg']:
-                messagebox.showerror(
-                    "Insufficient Stock",
-                    f"Only {stock['quantity_kg']:.1f} kg available in stock",
-                    parent=dialog
-                )
-                return
-        else:
-            quantity = int(quantity)
-            if quantity > stock['quantity_bags']:
-                messagebox.showerror(
-                    "Insufficient Stock",
-                    f"Only {stock['quantity_bags']} bags available in stock",
-                    parent=dialog
-                )
-                return
+        quantity = self.check_stock(item.product_id, item.sale_type, quantity, dialog)
+        if quantity is None:
+            return
         
         # Update cart item
-        item['quantity'] = quantity
-        item['subtotal'] = quantity * item['price']
+        old_subtotal = item.subtotal
+        item.quantity = quantity
+        item.subtotal = quantity * item.price
+        self.cart_subtotal += item.subtotal - old_subtotal
         
-        self.refresh_cart()
+        # Rewrite just this row
+        self.cart_tree.item(item.iid, values=self.cart_row_values(item))
+        self.update_totals()
         dialog.destroy()
         
         messagebox.showinfo(
@@ -1319,7 +1654,7 @@ class POSApplication:
             messagebox.showwarning("Empty Cart", "Cannot apply discount to empty cart", parent=self.root)
             return
         
-        subtotal = sum(item['subtotal'] for item in self.cart_items)
+        subtotal = self.cart_subtotal
         
         discount = simpledialog.askfloat(
             "Apply Discount",
@@ -1358,8 +1693,9 @@ class POSApplication:
             messagebox.showwarning("Empty Cart", "Cannot checkout with empty cart", parent=self.root)
             return
         
-        # Confirm sale
-        subtotal = sum(item['subtotal'] for item in self.cart_items)
+        # Re-derive the running subtotal so drift from repeated +=/-= on
+        # add, edit and remove never reaches the sale; fsum keeps it exact
+        subtotal = self.cart_subtotal = math.fsum(item.subtotal for item in self.cart_items)
         final_amount = subtotal - self.discount_amount
         
         confirm_msg = f"Confirm CASH Payment\n\n"
@@ -1372,7 +1708,39 @@ class POSApplication:
         if not messagebox.askyesno("Confirm Payment", confirm_msg, parent=self.root):
             return
         
-        # Create sale
+        # Stock is about to change; don't answer later checks from the cache
+        self._stock_cache.clear()
+        
+        # Create sale; the whole cart is written in one transaction
+        items = []
+        for item in self.cart_items:
+            by_kg = item.sale_type == 'by_kg'
+            items.append({
+                'product_id': item.product_id,
+                'product_name': item.product_name,
+                'sale_type': item.sale_type,
+                'quantity_kg': item.quantity if by_kg else None,
+                'quantity_bags': None if by_kg else item.quantity,
+                'price_per_unit': item.price,
+                'subtotal': item.subtotal
+            })
+        
+        sale_id = db.create_sale(
+            self.user_data['id'],
+            items,
+            discount_amount=self.discount_amount,
+            discount_reason=self.discount_reason or None,
+            payment_method=payment_method
+        )
+        if sale_id is None:
+            messagebox.showerror(
+                "Payment Failed",
+                "The sale could not be saved. Stock may have changed - please check the cart.",
+                parent=self.root
+            )
+            self.load_products()
+            return
+        
         messagebox.showinfo(
             "Payment Completed",
             f"✓ Payment completed successfully!\n\nAmount: RS.{final_amount:.2f}",
@@ -1380,14 +1748,13 @@ class POSApplication:
         )
         
         # Clear cart
-        self.clear_cart()
+        self.clear_cart(confirm=False)
         self.load_products()
-        self.update_today_summary()
-        self.update_cash_drawer()
+        self.schedule_summary_refresh()
     
-    def clear_cart(self):
+    def clear_cart(self, confirm=True):
         """Clear shopping cart"""
-        if self.cart_items:
+        if self.cart_items and confirm:
             if not messagebox.askyesno(
                 "Clear Cart",
                 "Are you sure you want to clear the cart?",
@@ -1396,41 +1763,59 @@ class POSApplication:
                 return
         
         self.cart_items = []
+        self.cart_subtotal = 0.0
         self.discount_amount = 0
         self.discount_reason = ""
         self.cart_tree.delete(*self.cart_tree.get_children())
         self.update_totals()
     
-    def update_today_summary(self):
+    def update_today_summary(self, summary):
         """Update today's summary labels"""
         try:
-            summary = db.get_today_summary()
-            
             if summary:
-                self.summary_sales_label.config(text=f"RS.{summary['total_sales']:.2f}")
-                self.summary_trans_label.config(text=str(summary['total_transactions']))
-                self.summary_cash_label.config(text=f"RS.{summary['cash_sales']:.2f}")
-                self.summary_credit_label.config(text=f"RS.{summary['credit_sales']:.2f}")
+                texts = (
+                    f"RS.{summary['total_sales']:.2f}",
+                    str(summary['total_transactions']),
+                    f"RS.{summary['cash_sales']:.2f}",
+                    f"RS.{summary['credit_sales']:.2f}"
+                )
+                # Leave the cards alone (no Tk redraw) when nothing changed
+                if texts == self._summary_texts:
+                    return
+                self._summary_texts = texts
+                
+                self.summary_sales_var.set(texts[0])
+                self.summary_trans_var.set(texts[1])
+                self.summary_cash_var.set(texts[2])
+                self.summary_credit_var.set(texts[3])
         except:
             pass
     
-    def update_cash_drawer(self):
+    def update_cash_drawer(self, summary):
         """Update cash drawer display with today's totals"""
         try:
-            summary = db.get_today_summary()
-            total_payouts = db.get_total_payouts_today()
-            
             if summary:
                 cash_sales = summary['cash_sales']
+                total_payouts = summary['total_payouts']
             else:
-                cash_sales = 0
+                cash_sales = total_payouts = 0
             
             net_cash = cash_sales - total_payouts
             
             # Update labels
-            self.cash_drawer_sales_label.config(text=f"RS.{cash_sales:.2f}")
-            self.cash_drawer_payout_label.config(text=f"RS.{total_payouts:.2f}")
-            self.cash_drawer_net_label.config(text=f"RS.{net_cash:.2f}")
+            texts = (
+                f"RS.{cash_sales:.2f}",
+                f"RS.{total_payouts:.2f}",
+                f"RS.{net_cash:.2f}"
+            )
+            # Same as the summary cards: no Tk update when nothing changed
+            if texts == self._cash_drawer_texts:
+                return
+            self._cash_drawer_texts = texts
+            
+            self.cash_drawer_sales_var.set(texts[0])
+            self.cash_drawer_payout_var.set(texts[1])
+            self.cash_drawer_net_var.set(texts[2])
         except Exception as e:
             print(f"Error updating cash drawer: {str(e)}")
     
@@ -1470,7 +1855,7 @@ class POSApplication:
         tk.Label(
             header,
             text="📦 Current Stock Status",
-            font=("Arial", 16, "bold"),
+            font=self.f_bold16,
             bg="#3498db",
             fg="white"
         ).pack(pady=15)
@@ -1534,7 +1919,7 @@ class POSApplication:
         tk.Button(
             stock_window,
             text="Close",
-            font=("Arial", 11),
+            font=self.f_norm11,
             bg="#95a5a6",
             fg="white",
             padx=30,
@@ -1571,39 +1956,57 @@ class POSApplication:
     def backup_database(self):
         """Create database backup"""
         try:
-            import shutil
-            from datetime import datetime
-            
             # Create backups directory if not exists
             if not os.path.exists('backups'):
                 os.makedirs('backups')
-            
-            # Generate backup filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = f"backups/ricemill_pos_backup_{timestamp}.db"
-            
-            # Copy database
-            shutil.copy2('ricemill_pos.db', backup_file)
-            
-            messagebox.showinfo(
-                "Backup Successful",
-                f"Database backed up successfully!\n\nFile: {backup_file}",
-                parent=self.root
-            )
         except Exception as e:
-            messagebox.showerror(
-                "Backup Failed",
-                f"Failed to create backup:\n{str(e)}",
-                parent=self.root
-            )
+            self.backup_failed(e)
+            return
+        
+        # Generate backup filename
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_file = f"backups/ricemill_pos_backup_{timestamp}.db"
+        
+        # Copy pages through SQLite on the database thread; unlike a file copy
+        # this can't catch a half-written page or miss data still in the WAL
+        self.root.config(cursor="watch")
+        run_db_task(
+            self.root,
+            lambda result: self.backup_finished(backup_file),
+            db.backup_to, backup_file,
+            on_error=self.backup_failed
+        )
+    
+    def backup_finished(self, backup_file):
+        """Report a completed backup"""
+        self.root.config(cursor="")
+        messagebox.showinfo(
+            "Backup Successful",
+            f"Database backed up successfully!\n\nFile: {backup_file}",
+            parent=self.root
+        )
+    
+    def backup_failed(self, error):
+        """Report a failed backup"""
+        self.root.config(cursor="")
+        messagebox.showerror(
+            "Backup Failed",
+            f"Failed to create backup:\n{str(error)}",
+            parent=self.root
+        )
     
     def show_database_info(self):
         """Show database information"""
         try:
             db_size = os.path.getsize('ricemill_pos.db') / (1024 * 1024)
-            products_count = db.fetch_one("SELECT COUNT(*) as count FROM products")['count']
-            sales_count = db.fetch_one("SELECT COUNT(*) as count FROM sales")['count']
-            users_count = db.fetch_one("SELECT COUNT(*) as count FROM users")['count']
+            counts = db.fetch_one(
+                """SELECT (SELECT COUNT(*) FROM products) AS products,
+                          (SELECT COUNT(*) FROM sales) AS sales,
+                          (SELECT COUNT(*) FROM users) AS users"""
+            )
+            products_count = counts['products']
+            sales_count = counts['sales']
+            users_count = counts['users']
             
             msg = "📊 Database Information\n"
             msg += "=" * 40 + "\n"
@@ -1644,22 +2047,23 @@ class POSApplication:
                 messagebox.showinfo("Stock Status", "No products found", parent=self.root)
                 return
             
+            # Reopening only refreshes the rows of the window built last time
+            if self._stock_window is not None and self._stock_window.winfo_exists():
+                self.fill_stock_tree(self._stock_tree, stock_status)
+                self._stock_window.deiconify()
+                self._stock_window.lift()
+                return
+            
             # Create a window to display stock status
             stock_window = tk.Toplevel(self.root)
             stock_window.title("Stock Status Report")
-            stock_window.geometry("900x500")
-            
-            # Center window
-            stock_window.update_idletasks()
-            x = (stock_window.winfo_screenwidth() // 2) - (stock_window.winfo_width() // 2)
-            y = (stock_window.winfo_screenheight() // 2) - (stock_window.winfo_height() // 2)
-            stock_window.geometry(f"+{x}+{y}")
+            self.center_window(stock_window, 900, 500)
             
             # Header
             header = tk.Label(
                 stock_window,
                 text="📦 Stock Status Report",
-                font=("Arial", 14, "bold"),
+                font=self.f_bold14,
                 bg="#27ae60",
                 fg="white",
                 pady=10
@@ -1675,10 +2079,6 @@ class POSApplication:
             scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
             
             # Treeview
-            style = ttk.Style()
-            style.configure("Stock.Treeview", rowheight=25, font=("Arial", 10))
-            style.configure("Stock.Treeview.Heading", font=("Arial", 11, "bold"))
-            
             columns = ('product', 'quality', 'stock_kg', 'stock_bags', 'status', 'price_kg')
             tree = ttk.Treeview(
                 tree_frame,
@@ -1704,124 +2104,92 @@ class POSApplication:
             
             scrollbar.config(command=tree.yview)
             
-            # Add data to treeview
-            for stock in stock_status:
-                status = stock['stock_status']
-                tag = 'low_stock' if status == 'Low Stock' else 'out_of_stock' if status == 'Out of Stock' else 'available'
-                
-                tree.insert('', 'end', values=(
-                    stock['name'],
-                    stock['quality'],
-                    f"{stock['quantity_kg']:.1f}",
-                    stock['quantity_bags'],
-                    status,
-                    f"{stock['price_per_kg']:.2f}"
-                ), tags=(tag,))
-            
             # Configure tags for coloring
             tree.tag_configure('available', foreground='green')
             tree.tag_configure('low_stock', foreground='orange')
             tree.tag_configure('out_of_stock', foreground='red')
             
-            tree.pack(fill=tk.BOTH, expand=True)
+            # Add data to treeview
+            self.fill_stock_tree(tree, stock_status)
+            
+            # Closing only hides the window so the next open can reuse it
+            stock_window.protocol("WM_DELETE_WINDOW", stock_window.withdraw)
+            self._stock_window = stock_window
+            self._stock_tree = tree
             
             # Close button
             tk.Button(
                 stock_window,
                 text="Close",
-                font=("Arial", 11),
+                font=self.f_norm11,
                 bg="#e74c3c",
                 fg="white",
                 padx=20,
                 pady=8,
                 relief=tk.FLAT,
                 cursor="hand2",
-                command=stock_window.destroy
+                command=stock_window.withdraw
             ).pack(pady=10)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load stock status:\n{str(e)}", parent=self.root)
     
+    def fill_stock_tree(self, tree, stock_status):
+        """Fill the stock status tree, keeping it unmapped while rows go in"""
+        # Format every row up front, then insert with no geometry work in between
+        rows = [
+            ((
+                stock['name'],
+                stock['quality'],
+                "%.1f" % stock['quantity_kg'],
+                stock['quantity_bags'],
+                stock['stock_status'],
+                "%.2f" % stock['price_per_kg']
+            ), (STOCK_STATUS_TAGS.get(stock['stock_status'], 'available'),))
+            for stock in stock_status
+        ]
+        
+        tree.pack_forget()
+        tree.delete(*tree.get_children())
+        for values, tags in rows:
+            tree.insert('', 'end', values=values, tags=tags)
+        tree.pack(fill=tk.BOTH, expand=True)
+    
     def show_user_guide(self):
         """Show user guide"""
-        guide = """RICE MILL POS - USER GUIDE
-
-MAKING A SALE:
-1. Select product from list
-2. Click 'Add to Cart' or press F2
-3. Choose sale type (by kg or by bag)
-4. Enter quantity
-5. Click 'Add to Cart'
-6. Repeat for more items
-7. Apply discount if needed (Admin only)
-8. Click 'Cash Sale' or 'Credit Sale'
-
-KEYBOARD SHORTCUTS:
-F1 - New Sale (Clear Cart)
-F2 - Add selected product to cart
-F5 - Refresh product list
-ESC - Clear cart
-
-MANAGING STOCK (Admin):
-• Menu → Products → Manage Stock
-• Select product and choose:
-  - Restock: Add new inventory
-  - Adjust: Correct errors
-
-REPORTS:
-• Menu → Reports → Sales Reports
-• View today's summary
-• Export data to CSV
-
-For more help, contact your system administrator.
-        """
+        # The guide never changes, so show the window built last time
+        if self._help_window is not None and self._help_window.winfo_exists():
+            self._help_window.deiconify()
+            self._help_window.lift()
+            return
         
         help_window = tk.Toplevel(self.root)
         help_window.title("User Guide")
-        help_window.geometry("600x500")
-        
-        # Center window
-        help_window.update_idletasks()
-        x = (help_window.winfo_screenwidth() // 2) - (help_window.winfo_width() // 2)
-        y = (help_window.winfo_screenheight() // 2) - (help_window.winfo_height() // 2)
-        help_window.geometry(f"+{x}+{y}")
+        self.center_window(help_window, 600, 500)
         
-        text = tk.Text(help_window, font=("Courier", 10), wrap=tk.WORD, padx=20, pady=20)
+        text = tk.Text(help_window, font=self.f_mono10, wrap=tk.WORD, padx=20, pady=20)
         text.pack(fill=tk.BOTH, expand=True)
-        text.insert('1.0', guide)
+        text.insert('1.0', USER_GUIDE_TEXT)
         text.config(state=tk.DISABLED)
         
         tk.Button(
             help_window,
             text="Close",
-            font=("Arial", 11),
-            command=help_window.destroy
+            font=self.f_norm11,
+            command=help_window.withdraw
         ).pack(pady=10)
+        
+        help_window.protocol("WM_DELETE_WINDOW", help_window.withdraw)
+        self._help_window = help_window
     
     def show_shortcuts(self):
         """Show keyboard shortcuts"""
-        shortcuts = """KEYBOARD SHORTCUTS
-
-F1    - New Sale (Clear Cart)
-F2    - Add Product to Cart
-F5    - Refresh Product List
-ESC   - Clear Cart
-Enter - Confirm dialogs
-        """
-        messagebox.showinfo("Keyboard Shortcuts", shortcuts, parent=self.root)
+        messagebox.showinfo("Keyboard Shortcuts", SHORTCUTS_TEXT, parent=self.root)
     
     def show_about(self):
         """Show about dialog"""
-        about = """🌾 RICE MILL POS SYSTEM
-Version 1.0
-
-Complete offline Point of Sale system
-for small rice mill businesses.
-
-Built with Python and Tkinter.
-        """
         messagebox.showinfo(
             "About Rice Mill POS",
-            about,
+            ABOUT_TEXT,
             parent=self.root
         )
     
@@ -1839,16 +2207,10 @@ Built with Python and Tkinter.
         """Open cash payout window"""
         payout_window = tk.Toplevel(self.root)
         payout_window.title("Cash Payout")
-        payout_window.geometry("500x450")
+        self.center_window(payout_window, 500, 450)
         payout_window.transient(self.root)
         payout_window.resizable(False, False)
         
-        # Center window
-        payout_window.update_idletasks()
-        x = (payout_window.winfo_screenwidth() // 2) - (payout_window.winfo_width() // 2)
-        y = (payout_window.winfo_screenheight() // 2) - (payout_window.winfo_height() // 2)
-        payout_window.geometry(f"+{x}+{y}")
-        
         # Header
         header = tk.Frame(payout_window, bg="#e74c3c", height=60)
         header.pack(fill=tk.X)
@@ -1857,7 +2219,7 @@ Built with Python and Tkinter.
         tk.Label(
             header,
             text="💸 Cash Payout Request",
-            font=("Arial", 16, "bold"),
+            font=self.f_bold16,
             bg="#e74c3c",
             fg="white"
         ).pack(pady=15)
@@ -1870,7 +2232,7 @@ Built with Python and Tkinter.
         tk.Label(
             form_frame,
             text="Payout Amount (RS.): *",
-            font=("Arial", 11, "bold"),
+            font=self.f_bold11,
             bg=payout_window.cget('bg')
         ).pack(anchor="w", pady=(0, 5))
         
@@ -1878,7 +2240,7 @@ Built with Python and Tkinter.
         amount_entry = tk.Entry(
             form_frame,
             textvariable=amount_var,
-            font=("Arial", 12),
+            font=self.f_norm12,
             width=30,
             relief=tk.SOLID,
             borderwidth=1
@@ -1890,7 +2252,7 @@ Built with Python and Tkinter.
         tk.Label(
             form_frame,
             text="Reason for Payout: *",
-            font=("Arial", 11, "bold"),
+            font=self.f_bold11,
             bg=payout_window.cget('bg')
         ).pack(anchor="w", pady=(0, 5))
         
@@ -1912,7 +2274,7 @@ Built with Python and Tkinter.
                 text=reason,
                 variable=reason_var,
                 value=reason,
-                font=("Arial", 10)
+                font=self.f_norm10
             ).pack(anchor="w", pady=2)
         
         reason_var.set("Daily Expenses")
@@ -1921,13 +2283,13 @@ Built with Python and Tkinter.
         tk.Label(
             form_frame,
             text="Additional Notes: (optional)",
-            font=("Arial", 11, "bold"),
+            font=self.f_bold11,
             bg=payout_window.cget('bg')
         ).pack(anchor="w", pady=(0, 5))
         
         notes_text = tk.Text(
             form_frame,
-            font=("Arial", 10),
+            font=self.f_norm10,
             height=3,
             width=40,
             relief=tk.SOLID,
@@ -1980,15 +2342,14 @@ Built with Python and Tkinter.
                     parent=payout_window
                 )
                 payout_window.destroy()
-                self.update_today_summary()
-                self.update_cash_drawer()
+                self.schedule_summary_refresh()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to process payout:\n{str(e)}", parent=payout_window)
         
         tk.Button(
             btn_frame,
             text="✓ Process Payout",
-            font=("Arial", 11, "bold"),
+            font=self.f_bold11,
             bg="#27ae60",
             fg="white",
             padx=20,
@@ -2001,7 +2362,7 @@ Built with Python and Tkinter.
         tk.Button(
             btn_frame,
             text="✕ Cancel",
-            font=("Arial", 11),
+            font=self.f_norm11,
             bg="#95a5a6",
             fg="white",
             padx=20,
@@ -2019,19 +2380,13 @@ Built with Python and Tkinter.
             # Create window
             history_window = tk.Toplevel(self.root)
             history_window.title("Payout History")
-            history_window.geometry("900x500")
-            
-            # Center window
-            history_window.update_idletasks()
-            x = (history_window.winfo_screenwidth() // 2) - (history_window.winfo_width() // 2)
-            y = (history_window.winfo_screenheight() // 2) - (history_window.winfo_height() // 2)
-            history_window.geometry(f"+{x}+{y}")
+            self.center_window(history_window, 900, 500)
             
             # Header
             header = tk.Label(
                 history_window,
                 text="💸 Payout History",
-                font=("Arial", 14, "bold"),
+                font=self.f_bold14,
                 bg="#e74c3c",
                 fg="white",
                 pady=10
@@ -2047,10 +2402,6 @@ Built with Python and Tkinter.
             scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
             
             # Treeview
-            style = ttk.Style()
-            style.configure("Payout.Treeview", rowheight=25, font=("Arial", 10))
-            style.configure("Payout.Treeview.Heading", font=("Arial", 11, "bold"))
-            
             columns = ('date', 'amount', 'reason', 'authorized_by', 'notes')
             tree = ttk.Treeview(
                 tree_frame,
@@ -2096,7 +2447,7 @@ Built with Python and Tkinter.
             tk.Label(
                 summary_frame,
                 text=summary_text,
-                font=("Arial", 11, "bold"),
+                font=self.f_bold11,
                 bg="#ecf0f1",
                 fg="#2c3e50"
             ).pack(pady=10)
@@ -2105,7 +2456,7 @@ Built with Python and Tkinter.
             tk.Button(
                 history_window,
                 text="Close",
-                font=("Arial", 11),
+                font=self.f_norm11,
                 bg="#95a5a6",
                 fg="white",
                 padx=20,
@@ -2131,6 +2482,12 @@ def main():
         app_root = tk.Tk()
         app = POSApplication(app_root, login.user_data)
         app_root.mainloop()
+    
+    # Let any queued query finish before its connection is closed
+    db_worker.shutdown(wait=True)
+    
+    # Checkpoints the WAL and lets SQLite update its statistics
+    db.close()
 
 
 if __name__ == "__main__":
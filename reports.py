@@ -516,15 +516,17 @@ class ReportsWindow:
             datetime.strptime(to_date, '%Y-%m-%d')
             
             # Get data
+            # Per-day totals are already split by payment method in
+            # daily_summary, so this only reads one row per day
             summary = db.fetch_one(
                 """SELECT 
-                    COUNT(*) as total_transactions,
-                    COALESCE(SUM(final_amount), 0) as total_sales,
-                    COALESCE(SUM(discount_amount), 0) as total_discount,
-                    COALESCE(SUM(CASE WHEN payment_method = 'cash' THEN final_amount ELSE 0 END), 0) as cash_sales,
-                    COALESCE(SUM(CASE WHEN payment_method = 'credit' THEN final_amount ELSE 0 END), 0) as credit_sales
-                   FROM sales
-                   WHERE DATE(sale_date) BETWEEN ? AND ? AND is_voided = 0""",
+                    COALESCE(SUM(total_transactions), 0) as total_transactions,
+                    COALESCE(SUM(total_sales), 0) as total_sales,
+                    COALESCE(SUM(total_discount), 0) as total_discount,
+                    COALESCE(SUM(cash_sales), 0) as cash_sales,
+                    COALESCE(SUM(credit_sales), 0) as credit_sales
+                   FROM daily_summary
+                   WHERE summary_date BETWEEN ? AND ?""",
                 (from_date, to_date))
             
             # Build report
@@ -544,13 +546,12 @@ class ReportsWindow:
             
             daily = db.fetch_all(
                 """SELECT 
-                    DATE(sale_date) as date,
-                    COUNT(*) as transactions,
-                    SUM(final_amount) as sales
-                   FROM sales
-                   WHERE DATE(sale_date) BETWEEN ? AND ? AND is_voided = 0
-                   GROUP BY DATE(sale_date)
-                   ORDER BY date""",
+                    summary_date as date,
+                    total_transactions as transactions,
+                    total_sales as sales
+                   FROM daily_summary
+                   WHERE summary_date BETWEEN ? AND ? AND total_transactions > 0
+                   ORDER BY summary_date""",
                 (from_date, to_date))
             
             for day in daily: